@@ -18,7 +18,10 @@ setup(
     author_email='guillaumesottas@gmail.com',
     description='high level API to retrieve information from ELF files.',
     long_description=long_description,
-    install_requires=['pyelftools'],
+    install_requires=['pyelftools>=0.29'],
+    extras_require={
+        'numpy': ['numpy']
+    },
     entry_points={
         'console_scripts': ['pyelf=pyelf:main']
     },
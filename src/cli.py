@@ -5,39 +5,263 @@
 """
 
 import argparse
+import concurrent.futures
+import io
 import json
+import os
+import sys
+import time
+import typing
 
-from pyelf.parser import ElfFile
+from pyelf.export import FORMATS, write
+from pyelf.parser import Address, Array, ElfFile, Pointer, Structure
+from pyelf.serializer import dump
 
+# output file of the description of the variables, if a single input file is given without output location.
+DEFAULT_OUTPUT_FILE = 'output2.json'
 
-def main():
-    parser = argparse.ArgumentParser(prog='pya2l', description='python command line utility for elf-formatted files.')
-    parser.add_argument('input_file', help='input file path')
+
+def _is_elf_file(path: str) -> bool:
+    try:
+        with open(path, 'rb') as fp:
+            return fp.read(4) == b'\x7fELF'
+    except OSError:
+        return False
+
+
+def _collect(inputs: typing.Iterable[str]) -> typing.Iterator[typing.Tuple[str, str]]:
+    """
+    returns an iterator on the input files, as tuples containing the path of each file and the name of its output
+    (the path of the file relative to the directory for the files found in a directory, its name otherwise). the
+    directories are searched recursively for ELF files.
+    """
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, directories, names in os.walk(path):
+                directories.sort()
+                for name in sorted(names):
+                    if _is_elf_file(os.path.join(root, name)):
+                        yield os.path.join(root, name), os.path.relpath(os.path.join(root, name), path)
+        else:
+            yield path, os.path.basename(path)
+
+
+def _describe(path: str,
+              output_path: typing.Union[str, None],
+              deduplicate: bool) -> typing.Tuple[float, typing.Union[str, None], typing.Union[str, None]]:
+    """
+    writes the JSON description of the variables of an ELF file to a file, or returns it if output_path is None. the
+    errors are caught, so that a bad file does not stop the other files from being processed.
+
+    :return: a tuple containing the processing time, in [s], the error message (None if successful) and the
+    description (None if written to a file)
+    """
+    start = time.perf_counter()
+    try:
+        if output_path is None:
+            fp = io.StringIO()
+        else:
+            if os.path.dirname(output_path):
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            fp = open(output_path, 'w')
+        with fp, ElfFile(path) as elf:
+            if deduplicate:
+                dump(elf.variables(), fp)
+            else:
+                json.dump([variable.to_json() for variable in elf.variables()], fp, indent=2, sort_keys=True)
+            description = fp.getvalue() if output_path is None else None
+    except Exception as e:
+        # the incomplete output is removed, so that it is not mistaken for a description.
+        if output_path is not None and os.path.isfile(output_path):
+            os.remove(output_path)
+        return time.perf_counter() - start, '{}: {}'.format(e.__class__.__name__, e), None
+    return time.perf_counter() - start, None, description
+
+
+def _describe_all(inputs: typing.List[typing.Tuple[str, typing.Union[str, None]]],
+                  deduplicate: bool,
+                  jobs: int) -> typing.List[typing.Tuple[float, typing.Union[str, None], typing.Union[str, None]]]:
+    """
+    describes several ELF files (see _describe) in a pool of jobs processes (in this process if jobs is 1), and
+    reports the result of each file on the standard error as soon as it is known.
+
+    :param inputs: tuples containing the path of each ELF file and the path of its output (None to return it)
+    :return: the results of _describe, in the order of the inputs
+    """
+    results = [None] * len(inputs)
+
+    def report(index: int, result: tuple):
+        results[index] = result
+        print('{:8.2f} s  {:6}  {}{}'.format(result[0], 'failed' if result[1] else 'ok', inputs[index][0],
+                                             ' ({})'.format(result[1]) if result[1] else ''), file=sys.stderr)
+
+    if jobs == 1:
+        for index, (path, output_path) in enumerate(inputs):
+            report(index, _describe(path, output_path, deduplicate))
+        return results
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = dict((executor.submit(_describe, path, output_path, deduplicate), index)
+                       for index, (path, output_path) in enumerate(inputs))
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # the worker process itself failed (it was killed, for instance).
+                result = 0.0, '{}: {}'.format(e.__class__.__name__, e), None
+            report(futures[future], result)
+    return results
+
+
+def _type_name(t) -> str:
+    """
+    returns the name of a type, as it would be declared in C for the arrays and pointers (with its bits for the bit
+    fields).
+    """
+    if isinstance(t, Structure.Field):
+        return '{} : {} (bit offset {})'.format(_type_name(t.type), t.bit_size, t.bit_offset)
+    suffix = ''
+    while isinstance(t, (Array, Pointer)):
+        if isinstance(t, Pointer):
+            suffix = '*' + suffix
+        else:
+            suffix += ''.join('[{}]'.format(d + 1) for d in t.dimension)
+        t = t.type
+    return getattr(t, 'name', str(t)) + suffix
+
+
+def diff(argv: typing.List[str]) -> int:
+    """
+    prints the differences between the variables of two ELF files (see ElfFile.diff), and returns 1 if there are
+    differences, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(prog='pyelf diff',
+                                     description='compares the variables of two builds of an elf-formatted file.')
+    parser.add_argument('old_file', help='ELF file of the old build')
+    parser.add_argument('new_file', help='ELF file of the new build')
+
+    args = parser.parse_args(argv)
+
+    with ElfFile(args.old_file) as old, ElfFile(args.new_file) as new:
+        differences = old.diff(new)
+        for kind, path, old_value, new_value in differences:
+            if kind in ('added', 'removed'):
+                print('{:8} {}'.format(kind, path))
+            elif kind == 'moved' and '.' not in path:
+                print('{:8} {}: {} -> {}'.format(kind, path, Address(old_value), Address(new_value)))
+            elif kind == 'moved':
+                print('{:8} {}: offset {} -> {}'.format(kind, path, old_value, new_value))
+            elif kind == 'resized':
+                print('{:8} {}: {} -> {} bytes'.format(kind, path, old_value, new_value))
+            else:
+                print('{:8} {}: {} -> {}'.format(kind, path, _type_name(old_value), _type_name(new_value)))
+    return 1 if differences else 0
+
+
+def main(argv: typing.Union[typing.List[str], None] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['diff']:
+        return diff(argv[1:])
+    parser = argparse.ArgumentParser(prog='pyelf',
+                                     description='python command line utility for elf-formatted files (see also '
+                                                 '"pyelf diff -h" to compare two files).')
+    parser.add_argument('input_files',
+                        nargs='+',
+                        metavar='input_file',
+                        help='input file path, or directory searched recursively for ELF files')
     parser.add_argument('-O',
                         dest='output_format',
                         metavar='output format',
                         action='store',
-                        default='binary',
-                        nargs='?',
-                        help='output file format')
+                        default=None,
+                        choices=FORMATS,
+                        help='output file format of -o (default: binary)')
+    parser.add_argument('-o',
+                        dest='output_file',
+                        metavar='output file',
+                        action='store',
+                        default=None,
+                        help='write the content of the loadable segments to this file, in the output file format '
+                             '(single input file only)')
+    parser.add_argument('-d',
+                        '--deduplicate',
+                        dest='deduplicate',
+                        action='store_true',
+                        help='write each type only once, and refer to it from the variables')
+    parser.add_argument('-D',
+                        '--output-dir',
+                        dest='output_dir',
+                        metavar='output directory',
+                        action='store',
+                        default=None,
+                        help='write the description of each input file to <output directory>/<input file name>.json '
+                             '(default: current directory, or {} for a single input file)'.format(DEFAULT_OUTPUT_FILE))
+    parser.add_argument('-m',
+                        '--merge',
+                        dest='merge_file',
+                        metavar='merged file',
+                        action='store',
+                        default=None,
+                        help='write the descriptions of all the input files to this file, as a JSON object mapping '
+                             'the path of each input file to its description')
+    parser.add_argument('-j',
+                        '--jobs',
+                        dest='jobs',
+                        metavar='N',
+                        action='store',
+                        type=int,
+                        default=1,
+                        help='number of input files processed in parallel (0 for the number of processors)')
+
+    args = parser.parse_args(argv)
 
-    args = parser.parse_args()
+    if args.output_format is not None and args.output_file is None:
+        parser.error('-O requires -o')
+    if args.output_file is not None:
+        if len(args.input_files) != 1 or os.path.isdir(args.input_files[0]):
+            parser.error('-o requires a single input file')
+        with ElfFile(args.input_files[0], load=()) as elf, open(args.output_file, 'wb') as fp:
+            write(elf.image(),
+                  fp,
+                  args.output_format or 'binary',
+                  start=elf.header['e_entry'],
+                  header=os.path.basename(args.output_file).encode())
+        return 0
 
-    elf = ElfFile(args.input_file)
-    result = list()
-    for variable in elf.variables():
-        # result.append(variable.to_json())
-        try:
-            result.append(variable.to_json())
-        except RecursionError as e:
-            print(f'{variable.name} | {str(e)}')
-            continue
-    with open('output2.json', 'w') as fp:
-        json.dump(result, fp, indent=2, sort_keys=True)
+    if args.output_dir is not None and args.merge_file is not None:
+        parser.error('--output-dir and --merge are mutually exclusive')
+    if args.jobs < 0:
+        parser.error('invalid number of jobs {}'.format(args.jobs))
+    inputs = list(_collect(args.input_files))
+    if not inputs:
+        parser.error('no ELF file found')
+    if args.merge_file is not None:
+        output_paths = [None] * len(inputs)
+    elif args.output_dir is None and len(args.input_files) == 1 and not os.path.isdir(args.input_files[0]):
+        output_paths = [DEFAULT_OUTPUT_FILE]
+    else:
+        output_paths = [os.path.join(args.output_dir or os.curdir, name + '.json') for _, name in inputs]
+        duplicates = sorted(set(p for p in output_paths if output_paths.count(p) > 1))
+        if duplicates:
+            parser.error('several input files have the same output {}'.format(', '.join(duplicates)))
 
-    # if args.output_format == 'binary':
-    #     args.output_file.write(elf.binary)
+    start = time.perf_counter()
+    results = _describe_all([(path, output_path) for (path, _), output_path in zip(inputs, output_paths)],
+                            args.deduplicate,
+                            args.jobs or os.cpu_count() or 1)
+    if args.merge_file is not None:
+        with open(args.merge_file, 'w') as fp:
+            fp.write('{')
+            separator = '\n'
+            for (path, _), (_, error, description) in zip(inputs, results):
+                if error is None:
+                    fp.write('{}{}: {}'.format(separator, json.dumps(path), description))
+                    separator = ',\n'
+            fp.write('\n}\n')
+    failures = sum(1 for _, error, _ in results if error is not None)
+    print('{} file(s) processed in {:.2f} s, {} failed'.format(len(results), time.perf_counter() - start, failures),
+          file=sys.stderr)
+    return 1 if failures else 0
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+:file: cache.py
+:author: Guillaume Sottas
+:date: 18/10/2026
+"""
+import hashlib
+import marshal
+import os
+import tempfile
+import typing
+import zlib
+
+
+class RecordCache(object):
+    """
+    stores the records created while parsing the DWARF information of ELF files in a directory, keyed by the digest
+    of the content of the ELF file.
+
+    each entry consists of a header (magic number, format version and digest of the payload) followed by the
+    compressed payload. entries which can not be read back are considered as missing.
+    """
+
+    MAGIC = b'PYELF'
+    VERSION = 5
+
+    _HEADER_SIZE = len(MAGIC) + 2 + hashlib.sha256().digest_size
+
+    def __init__(self, directory: str):
+        self._directory = directory
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @staticmethod
+    def key(path: str) -> str:
+        """
+        returns the key of the entry of an ELF file.
+
+        :param path: path of the ELF file
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as fp:
+            for chunk in iter(lambda: fp.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        """
+        returns the path of the entry file for the specified key.
+        """
+        return os.path.join(self.directory, '{}.pyelf'.format(key))
+
+    def load(self, key: str) -> typing.Union[typing.List[tuple], None]:
+        """
+        returns the records stored for the specified key, or None if the entry does not exist or is not valid.
+        """
+        try:
+            with open(self.path(key), 'rb') as fp:
+                data = fp.read()
+        except OSError:
+            return None
+        header, payload = data[:self._HEADER_SIZE], data[self._HEADER_SIZE:]
+        if header != self._header(payload):
+            return None
+        try:
+            records = marshal.loads(zlib.decompress(payload))
+        except (ValueError, EOFError, TypeError, zlib.error):
+            return None
+        return records if isinstance(records, list) else None
+
+    def store(self, key: str, records: typing.List[tuple]) -> bool:
+        """
+        stores the records for the specified key, and returns True if the entry has been written. the entry is written
+        to a temporary file first, so that concurrent readers never see a partially written entry. like the entries
+        which can not be read back, the entries which can not be written (unwritable or full directory) are considered
+        as missing.
+        """
+        payload = zlib.compress(marshal.dumps(records))
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        except OSError:
+            return False
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(self._header(payload))
+                fp.write(payload)
+            os.replace(tmp_path, self.path(key))
+        except OSError:
+            os.unlink(tmp_path)
+            return False
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return True
+
+    def _header(self, payload: bytes) -> bytes:
+        return self.MAGIC + bytes((self.VERSION, marshal.version)) + hashlib.sha256(payload).digest()
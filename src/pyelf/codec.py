@@ -0,0 +1,190 @@
+"""
+:file: codec.py
+:author: Guillaume Sottas
+:date: 18/10/2026
+"""
+import struct
+import typing
+
+from pyelf.model import (BOOLEAN_ENCODING, FLOAT_ENCODING, Array, BaseType, Constant, Enumeration, Pointer,
+                         Structure, TypedefType, Union, is_signed, unalias)
+
+_INTEGER_CODES = {1: 'b', 2: 'h', 4: 'i', 8: 'q'}
+_FLOAT_CODES = {2: 'e', 4: 'f', 8: 'd'}
+
+
+class Codec(object):
+    """
+    decoder of the values of a type from raw bytes.
+
+    the type is compiled once, when the codec is created. all the base types, enumerations and pointers it contains
+    are gathered in a single struct.Struct, which decodes them at once, and the value is then assembled from the
+    decoded fields by functions built along with the structure. structures are decoded into dictionaries, arrays into
+    lists (of lists, for arrays with several dimensions), unions into dictionaries holding the value of each member,
+    and base types, enumerations and pointers into numbers (or bytes for the base types without struct equivalent).
+    """
+
+    def __init__(self, t, endianness: str, sizeof: typing.Callable[[typing.Any], int], pointer_size: int):
+        """
+        :param t: type to decode
+        :param endianness: 'little' or 'big'
+        :param sizeof: function returning the size of a type, in [byte]
+        :param pointer_size: size of a pointer, in [byte]
+        :raise ValueError: if the type, or one of the types it contains, can not be decoded
+        """
+        self._type = t
+        self._byte_order = '<' if endianness == 'little' else '>'
+        self._sizeof = sizeof
+        self._pointer_size = pointer_size
+        self._format = [self._byte_order]
+        self._end = 0
+        self._count = 0
+        self._last = None
+        self._build = self._compile(t, 0)
+        self._struct = struct.Struct(''.join(self._format))
+        self._size = max(self._struct.size, sizeof(t))
+        del self._format
+
+    @property
+    def type(self):
+        return self._type
+
+    @property
+    def size(self) -> int:
+        """
+        returns the number of bytes needed to decode a value, in [byte].
+        """
+        return self._size
+
+    def decode(self, buffer: typing.Union[bytes, bytearray, memoryview], offset: int = 0) -> typing.Any:
+        """
+        returns the value decoded from a buffer.
+
+        :param buffer: object supporting the buffer protocol
+        :param offset: offset of the value in the buffer, in [byte]
+        """
+        return self._build(self._struct.unpack_from(buffer, offset), buffer, offset)
+
+    def _leaf(self, offset: int, code: str, count: typing.Union[int, None] = None) -> typing.Callable:
+        """
+        adds a value (or count values, if not None) of a struct format code at an offset to the structure, and returns
+        the function reading it (or a list of them) from the decoded values. the values overlapping the values already
+        added are read by a dedicated struct.Struct instead.
+        """
+        number = 1 if count is None else count
+        if self._last is not None and self._last[:3] == (offset, code, number):
+            index = self._last[3]
+        elif offset >= self._end:
+            if offset > self._end:
+                self._format.append('{}x'.format(offset - self._end))
+            self._format.append(code if count is None else '{}{}'.format(count, code))
+            index = self._count
+            self._count += number
+            self._end = offset + struct.calcsize(self._byte_order + code) * number
+            self._last = (offset, code, number, index)
+        else:
+            overlapping = struct.Struct('{}{}{}'.format(self._byte_order, number, code))
+            if count is None:
+                return lambda _v, b, o: overlapping.unpack_from(b, o + offset)[0]
+            return lambda _v, b, o: list(overlapping.unpack_from(b, o + offset))
+        if count is None:
+            return lambda v, _b, _o: v[index]
+        return lambda v, _b, _o: list(v[index:index + number])
+
+    def _compile(self, t, offset: int) -> typing.Callable:
+        if isinstance(t, (TypedefType, Constant)):
+            return self._compile(t.type, offset)
+        elif isinstance(t, (BaseType, Enumeration, Pointer)):
+            return self._compile_scalar(t, offset)
+        elif isinstance(t, Structure):
+            return self._compile_structure(t, offset)
+        elif isinstance(t, Union):
+            return self._compile_union(t, offset)
+        elif isinstance(t, Array):
+            return self._compile_array(t, offset)
+        raise ValueError('type {} can not be decoded'.format(getattr(t, 'name', t)))
+
+    def _code(self, t) -> typing.Union[str, None]:
+        """
+        returns the struct format code of a base type, an enumeration or a pointer, or None if it has no struct
+        equivalent.
+        """
+        if isinstance(t, Pointer):
+            return _INTEGER_CODES[self._pointer_size].upper()
+        elif isinstance(t, Enumeration):
+            code = _INTEGER_CODES.get(t.size)
+            return code.upper() if code is not None and not is_signed(t) else code
+        elif not isinstance(t, BaseType):
+            return None
+        elif t.encoding == FLOAT_ENCODING:
+            return _FLOAT_CODES.get(t.size)
+        elif t.encoding == BOOLEAN_ENCODING and t.size == 1:
+            return '?'
+        code = _INTEGER_CODES.get(t.size)
+        return code.upper() if code is not None and not is_signed(t) else code
+
+    def _compile_scalar(self, t, offset: int) -> typing.Callable:
+        code = self._code(t)
+        if code is None:
+            if isinstance(t, Enumeration):
+                raise ValueError('enumeration {} of {} bytes can not be decoded'.format(t.name, t.size))
+            code = '{}s'.format(t.size)
+        return self._leaf(offset, code)
+
+    def _compile_structure(self, t, offset: int) -> typing.Callable:
+        names = tuple(f.name for f in t.fields)
+        builders = tuple(self._compile_bit_field(f, offset) if f.bit_size is not None else
+                         self._compile(f.type, offset + f.offset) for f in t.fields)
+        return lambda v, b, o: dict(zip(names, [build(v, b, o) for build in builders]))
+
+    def _compile_bit_field(self, field, offset: int) -> typing.Callable:
+        """
+        returns the function reading a bit field. the bit offset is counted from the most significant bit of the
+        storage unit, whose size is the size of the type of the field (DW_AT_bit_offset).
+        """
+        t = unalias(field.type)
+        size = self._sizeof(t)
+        if size not in _INTEGER_CODES:
+            raise ValueError('bit field {} of {} bytes can not be decoded'.format(field.name, size))
+        unit = self._leaf(offset + field.offset, _INTEGER_CODES[size].upper())
+        shift = 8 * size - (field.bit_offset or 0) - field.bit_size
+        mask = (1 << field.bit_size) - 1
+        if is_signed(t):
+            sign = 1 << (field.bit_size - 1)
+            return lambda v, b, o: ((unit(v, b, o) >> shift & mask) ^ sign) - sign
+        return lambda v, b, o: unit(v, b, o) >> shift & mask
+
+    def _compile_union(self, t, offset: int) -> typing.Callable:
+        endianness = 'little' if self._byte_order == '<' else 'big'
+        names = tuple(m.name for m in t.members)
+        codecs = tuple(Codec(m.type, endianness, self._sizeof, self._pointer_size) for m in t.members)
+        return lambda _v, b, o: dict(zip(names, [codec.decode(b, o + offset) for codec in codecs]))
+
+    def _compile_array(self, t, offset: int) -> typing.Callable:
+        """
+        returns the function reading an array. the arrays of base types, enumerations or pointers are read as a
+        single repeated struct format code.
+        """
+        dimensions = [d + 1 for d in t.dimension]
+        count = 1
+        for dimension in dimensions:
+            count *= dimension
+        if not count:
+            return lambda _v, _b, _o: []
+        element = unalias(t.type)
+        code = self._code(element)
+        if code is not None:
+            read = self._leaf(offset, code, count)
+        else:
+            element_size = self._sizeof(element)
+            builders = tuple(self._compile(element, offset + i * element_size) for i in range(count))
+            read = lambda v, b, o: [build(v, b, o) for build in builders]
+        if len(dimensions) == 1:
+            return read
+        return lambda v, b, o: self._reshape(read(v, b, o), dimensions)
+
+    @staticmethod
+    def _reshape(values: typing.List[typing.Any], dimensions: typing.List[int]) -> typing.List[typing.Any]:
+        for dimension in reversed(dimensions[1:]):
+            values = [values[i:i + dimension] for i in range(0, len(values), dimension)]
+        return values
@@ -0,0 +1,171 @@
+"""
+:file: diff.py
+:author: Guillaume Sottas
+:date: 18/10/2026
+"""
+import typing
+
+from pyelf.model import Array, BaseType, Enumeration, Pointer, Structure, SubRoutine, Union, unalias
+
+
+def _is_anonymous(name: str) -> bool:
+    return name.startswith('anonymous_')
+
+
+class TypeDigests(object):
+    """
+    digests of the layout of types, as integers which are equal if and only if the layouts are equal.
+
+    the layout of a type is made of its kind, its size, the encoding of the base types, the enumerators of the
+    enumerations, the dimensions and the element of the arrays, and the names, offsets, bits and layouts of the
+    members of the structures and unions. the names of the types are not part of the layout, type definitions and
+    constants have the layout of the type they designate, and the layout of a pointer does not depend on the type it
+    points to. the names of the anonymous members, which depend on the DIE offsets, are replaced by their position.
+
+    the digest of a type is computed from the digests of the types it contains (like a Merkle tree), once per type,
+    and the layouts are numbered in a table which can be shared by the digests of several ELF files, so that the
+    types of two files can be compared by their digests.
+    """
+
+    def __init__(self, sizeof: typing.Callable[[typing.Any], int], layouts: typing.Union[dict, None] = None):
+        """
+        :param sizeof: function returning the size of a type, in [byte]
+        :param layouts: table numbering the layouts, shared with other TypeDigests objects to compare their types
+        """
+        self._sizeof = sizeof
+        self._layouts = dict() if layouts is None else layouts
+        self._digests = dict()
+
+    @property
+    def layouts(self) -> dict:
+        return self._layouts
+
+    def members(self, t) -> typing.List[typing.Tuple[typing.Any, typing.Any]]:
+        """
+        returns the members of a structure or a union as tuples containing the key identifying the member (its name,
+        or its position among the anonymous members) and the member itself.
+        """
+        members = t.fields if isinstance(t, Structure) else t.members
+        keys, anonymous = list(), 0
+        for member in members:
+            if _is_anonymous(member.name):
+                keys.append(('#', anonymous))
+                anonymous += 1
+            else:
+                keys.append(member.name)
+        return list(zip(keys, members))
+
+    def size(self, t) -> int:
+        """
+        returns the size of a type, in [byte].
+        """
+        return self._sizeof(t)
+
+    def digest(self, t) -> int:
+        """
+        returns the digest of the layout of a type.
+        """
+        t = unalias(t)
+        if t not in self._digests:
+            self._digests[t] = self._layouts.setdefault(self._layout(t), len(self._layouts))
+        return self._digests[t]
+
+    def _layout(self, t) -> tuple:
+        if isinstance(t, BaseType):
+            return 'base', t.size, t.encoding
+        elif isinstance(t, Enumeration):
+            return 'enumeration', t.size, tuple((e.name, e.value) for e in t.enumerators)
+        elif isinstance(t, Pointer):
+            return 'pointer', self._sizeof(t)
+        elif isinstance(t, Array):
+            return 'array', tuple(t.dimension), self.digest(t.type)
+        elif isinstance(t, Structure):
+            return ('structure', t.size, tuple((k, f.offset, f.bit_offset, f.bit_size, self.digest(f.type))
+                                               for k, f in self.members(t)))
+        elif isinstance(t, Union):
+            return 'union', t.size, tuple((k, self.digest(m.type)) for k, m in self.members(t))
+        elif isinstance(t, SubRoutine):
+            return 'subroutine',
+        return 'unknown', str(t)
+
+
+def diff(old_variables: typing.Iterable[typing.Any],
+         new_variables: typing.Iterable[typing.Any],
+         old_sizeof: typing.Callable[[typing.Any], int],
+         new_sizeof: typing.Callable[[typing.Any], int]) -> typing.List[typing.Tuple[str, str, typing.Any, typing.Any]]:
+    """
+    returns the differences between two sets of variables, as tuples containing the kind of the difference, the path
+    of the variable or field, and its old and new value, sorted by variable name:
+
+    - 'added' and 'removed': a variable or a member exists in one set only (the value is the variable or the member,
+      None in the other set)
+    - 'moved': the address of a variable, or the offset of a member in its parent, has changed
+    - 'resized': the size of a variable or of a member has changed (the values are the sizes, in [byte])
+    - 'changed': the layout of a type has changed (the values are the types), or the bits of a bit field have changed
+      (the values are the members)
+
+    the layouts of the types are compared by digest (see TypeDigests), so that the types whose layout has not
+    changed are not walked.
+
+    :param old_variables: variables of the old build
+    :param new_variables: variables of the new build
+    :param old_sizeof: function returning the size of a type of the old build, in [byte]
+    :param new_sizeof: function returning the size of a type of the new build, in [byte]
+    """
+    old = dict((v.name, v) for v in old_variables)
+    new = dict((v.name, v) for v in new_variables)
+    old_digests = TypeDigests(old_sizeof)
+    new_digests = TypeDigests(new_sizeof, old_digests.layouts)
+    differences = list()
+    for name in sorted(set(old) | set(new)):
+        if name not in new:
+            differences.append(('removed', name, old[name], None))
+        elif name not in old:
+            differences.append(('added', name, None, new[name]))
+        else:
+            if old[name].address != new[name].address:
+                differences.append(('moved', name, old[name].address, new[name].address))
+            differences.extend(_diff_types(name, old[name].type, new[name].type, old_digests, new_digests))
+    return differences
+
+
+def _diff_types(path: str, old, new, old_digests: TypeDigests, new_digests: TypeDigests) -> typing.List[tuple]:
+    """
+    returns the differences between two types at the same path (see diff).
+    """
+    if old_digests.digest(old) == new_digests.digest(new):
+        return list()
+    old, new = unalias(old), unalias(new)
+    differences = list()
+    old_size, new_size = old_digests.size(old), new_digests.size(new)
+    if old_size != new_size:
+        differences.append(('resized', path, old_size, new_size))
+    if type(old) is not type(new) or not isinstance(old, (Structure, Union, Array)):
+        differences.append(('changed', path, old, new))
+    elif isinstance(old, Array):
+        if old.dimension != new.dimension:
+            differences.append(('changed', path, old, new))
+        else:
+            differences.extend(_diff_types(path + '[*]', old.type, new.type, old_digests, new_digests))
+    else:
+        old_members, new_members = dict(old_digests.members(old)), dict(new_digests.members(new))
+        for key, member in old_digests.members(old):
+            if key not in new_members:
+                differences.append(('removed', '{}.{}'.format(path, member.name), member, None))
+        for key, member in new_digests.members(new):
+            member_path = '{}.{}'.format(path, member.name)
+            if key not in old_members:
+                differences.append(('added', member_path, None, member))
+                continue
+            old_member = old_members[key]
+            if isinstance(old, Structure):
+                if old_member.offset != member.offset:
+                    differences.append(('moved', member_path, old_member.offset, member.offset))
+                if (old_member.bit_offset, old_member.bit_size) != (member.bit_offset, member.bit_size):
+                    differences.append(('changed', member_path, old_member, member))
+                    continue
+            differences.extend(_diff_types(member_path, old_member.type, member.type, old_digests, new_digests))
+        if not differences:
+            # the members are the same, but they are declared in another order.
+            differences.append(('changed', path, old, new))
+    return differences
@@ -0,0 +1,105 @@
+"""
+:file: dtypes.py
+:author: Guillaume Sottas
+:date: 18/10/2026
+"""
+import typing
+
+from pyelf.model import (BOOLEAN_ENCODING, FLOAT_ENCODING, Array, BaseType, Enumeration, Pointer, Structure,
+                         Union, is_signed, unalias)
+
+
+def _numpy():
+    """
+    returns the numpy module, which is imported the first time a dtype is requested only.
+    """
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('numpy is required to build dtypes (pip install sauci-pyelf[numpy])')
+    return numpy
+
+
+def to_dtype(t, endianness: str, sizeof: typing.Callable[[typing.Any], int], pointer_size: int):
+    """
+    returns the numpy structured dtype equivalent to a type: the structures and unions are turned into structured
+    dtypes with the offsets and the size of their fields, the arrays into sub-arrays of their element, and the base
+    types, enumerations and pointers into scalars of the same size and byte order (raw bytes for the base types
+    without numpy equivalent).
+
+    the bit fields are turned into their storage unit, an unsigned integer at the offset of the field whose dtype
+    holds the position of the field in its metadata. their values are extracted by extract_bit_field.
+
+    :param t: type to convert
+    :param endianness: 'little' or 'big'
+    :param sizeof: function returning the size of a type, in [byte]
+    :param pointer_size: size of a pointer, in [byte]
+    :raise ValueError: if the type, or one of the types it contains, has no dtype equivalent
+    """
+    numpy = _numpy()
+    byte_order = '<' if endianness == 'little' else '>'
+
+    def convert(element):
+        element = unalias(element)
+        if isinstance(element, Pointer):
+            return numpy.dtype('{}u{}'.format(byte_order, pointer_size))
+        elif isinstance(element, Enumeration):
+            return numpy.dtype('{}{}{}'.format(byte_order, 'i' if is_signed(element) else 'u', element.size))
+        elif isinstance(element, BaseType):
+            if element.encoding == FLOAT_ENCODING and element.size in (2, 4, 8):
+                return numpy.dtype('{}f{}'.format(byte_order, element.size))
+            elif element.encoding == BOOLEAN_ENCODING and element.size == 1:
+                return numpy.dtype('?')
+            elif element.size in (1, 2, 4, 8):
+                return numpy.dtype('{}{}{}'.format(byte_order, 'i' if is_signed(element) else 'u', element.size))
+            return numpy.dtype('V{}'.format(element.size))
+        elif isinstance(element, Array):
+            return numpy.dtype((convert(element.type), tuple(d + 1 for d in element.dimension) or (0,)))
+        elif isinstance(element, Structure):
+            return numpy.dtype(dict(names=[f.name for f in element.fields],
+                                    formats=[bit_field(f) if f.bit_size is not None else convert(f.type)
+                                             for f in element.fields],
+                                    offsets=[f.offset for f in element.fields],
+                                    itemsize=element.size))
+        elif isinstance(element, Union):
+            return numpy.dtype(dict(names=[m.name for m in element.members],
+                                    formats=[convert(m.type) for m in element.members],
+                                    offsets=[0] * len(element.members),
+                                    itemsize=element.size))
+        raise ValueError('type {} has no dtype equivalent'.format(getattr(element, 'name', element)))
+
+    def bit_field(field):
+        unit = unalias(field.type)
+        size = sizeof(unit)
+        if size not in (1, 2, 4, 8):
+            raise ValueError('bit field {} of {} bytes has no dtype equivalent'.format(field.name, size))
+        metadata = dict(shift=8 * size - (field.bit_offset or 0) - field.bit_size,
+                        bit_size=field.bit_size,
+                        signed=is_signed(unit))
+        return numpy.dtype('{}u{}'.format(byte_order, size), metadata=metadata)
+
+    return convert(t)
+
+
+def extract_bit_field(records, name: str):
+    """
+    returns the values of a bit field of an array of structures whose dtype was built by to_dtype, as an array of
+    integers with the native byte order.
+
+    :param records: numpy array of structures
+    :param name: name of the bit field
+    :raise ValueError: if the field is not a bit field
+    """
+    numpy = _numpy()
+    unit = records.dtype.fields[name][0]
+    metadata = unit.metadata or dict()
+    if 'bit_size' not in metadata:
+        raise ValueError('field {} is not a bit field'.format(name))
+    values = numpy.asarray(records[name], dtype=unit.newbyteorder('='))
+    # the field is moved to the most significant bits, and then back to the least significant bits, with a sign
+    # extension for the signed fields.
+    left = 8 * unit.itemsize - metadata['shift'] - metadata['bit_size']
+    values = values << left
+    if metadata['signed']:
+        values = values.view(numpy.dtype('i{}'.format(unit.itemsize)))
+    return values >> (left + metadata['shift'])
@@ -0,0 +1,189 @@
+"""
+:file: export.py
+:author: Guillaume Sottas
+:date: 18/10/2026
+"""
+import array
+import sys
+import typing
+
+from pyelf.image import Image
+
+FORMATS = ('binary', 'ihex', 'srec')
+
+
+# tables giving the checksum byte of the Intel HEX and S-record records, from the sum of their bytes.
+_NEGATE = bytes(-i & 0xFF for i in range(0x100))
+_INVERT = bytes(~i & 0xFF for i in range(0x100))
+
+
+def _iter_pieces(image: Image,
+                 chunk_size: int,
+                 boundary: typing.Union[int, None] = None) -> typing.Iterator[typing.Tuple[int, bytes]]:
+    """
+    returns an iterator on the content of an image, split into pieces of at most chunk_size bytes which never cross a
+    multiple of boundary (if not None). each piece is returned with its address.
+    """
+    for address, data in image.chunks(chunk_size):
+        offset = 0
+        while offset < len(data):
+            size = len(data) - offset
+            if boundary is not None:
+                size = min(size, boundary - (address + offset) % boundary)
+            yield address + offset, bytes(data[offset:offset + size])
+            offset += size
+
+
+def _iter_groups(data: bytes, record_size: int) -> typing.Iterator[typing.Tuple[int, int, int]]:
+    """
+    returns an iterator on the groups of records of the same size needed to hold data: the full records, followed by
+    the last, shorter record if any. each group is returned as a tuple containing its offset in data, its number of
+    records and their size.
+    """
+    count, remainder = divmod(len(data), record_size)
+    if count:
+        yield 0, count, record_size
+    if remainder:
+        yield count * record_size, 1, remainder
+
+
+def _address_columns(address: int, count: int, step: int, size: int) -> typing.List[bytes]:
+    """
+    returns the bytes of the addresses address + i * step (i < count) as size columns, the most significant first.
+    """
+    addresses = array.array('Q', range(address, address + count * step, step))
+    if sys.byteorder == 'little':
+        addresses.byteswap()
+    raw = addresses.tobytes()
+    return [raw[addresses.itemsize - size + i::addresses.itemsize] for i in range(size)]
+
+
+def _encode_records(prefix: str, columns: typing.List[bytes], table: bytes) -> str:
+    """
+    returns the text of several records. the record i is made of the byte i of each column, followed by a checksum
+    byte given by table for the sum of these bytes. each record is written in hexadecimal, preceded by prefix and
+    followed by a line end.
+
+    the records are assembled and their checksums computed column by column, the columns being added as integers
+    holding one byte of each record in 24-bit lanes. the cost per record is therefore almost independent of the
+    number of bytes of a record.
+    """
+    count, width = len(columns[0]), len(columns) + 1
+    records = bytearray(count * width)
+    total = 0
+    for index, column in enumerate(columns):
+        records[index::width] = column
+        lanes = bytearray(3 * count)
+        lanes[2::3] = column
+        total += int.from_bytes(lanes, 'big')
+    records[width - 1::width] = total.to_bytes(3 * count, 'big')[2::3].translate(table)
+    text = records.hex().upper()
+    return ''.join([prefix + text[i:i + 2 * width] + '\r\n' for i in range(0, len(text), 2 * width)])
+
+
+def write_binary(image: Image, fp: typing.BinaryIO, chunk_size: int = 1 << 16, **_kwargs):
+    """
+    writes an image to a file object as raw binary data, the gaps between the segments being filled with the fill
+    byte of the image.
+
+    :param image: image to write
+    :param fp: file object opened in binary mode
+    :param chunk_size: maximum number of bytes read from the image at once
+    """
+    image.write(fp, chunk_size)
+
+
+def write_ihex(image: Image,
+               fp: typing.BinaryIO,
+               start: typing.Union[int, None] = None,
+               record_size: int = 16,
+               chunk_size: int = 1 << 16,
+               **_kwargs):
+    """
+    writes an image to a file object in Intel HEX format. the gaps between the segments are not written.
+
+    :param image: image to write
+    :param fp: file object opened in binary mode
+    :param start: start address, written in a start linear address record if not None
+    :param record_size: maximum number of data bytes per record
+    :param chunk_size: maximum number of bytes read from the image at once
+    """
+    if not 0 < record_size <= 0xFF:
+        raise ValueError('invalid record size {}'.format(record_size))
+    upper = 0
+    for address, data in _iter_pieces(image, chunk_size, 0x10000):
+        text = list()
+        if address >> 16 != upper:
+            upper = address >> 16
+            text.append(_ihex_record(0x04, 0x0000, upper.to_bytes(2, 'big')))
+        for offset, count, size in _iter_groups(data, record_size):
+            columns = [bytes((size,)) * count]
+            columns.extend(_address_columns((address + offset) & 0xFFFF, count, size, 2))
+            columns.append(bytes(count))
+            columns.extend(data[offset + i:offset + count * size:size] for i in range(size))
+            text.append(_encode_records(':', columns, _NEGATE))
+        fp.write(''.join(text).encode('ascii'))
+    if start is not None:
+        fp.write(_ihex_record(0x05, 0x0000, start.to_bytes(4, 'big')).encode('ascii'))
+    fp.write(_ihex_record(0x01, 0x0000, b'').encode('ascii'))
+
+
+def _ihex_record(record_type: int, address: int, data: bytes) -> str:
+    record = bytes((len(data), address >> 8, address & 0xFF, record_type)) + data
+    return _encode_records(':', [record[i:i + 1] for i in range(len(record))], _NEGATE)
+
+
+def write_srec(image: Image,
+               fp: typing.BinaryIO,
+               start: typing.Union[int, None] = None,
+               record_size: int = 16,
+               chunk_size: int = 1 << 16,
+               header: bytes = b'',
+               **_kwargs):
+    """
+    writes an image to a file object in Motorola S-record format. the size of the addresses (16, 24 or 32 bits) is
+    the smallest one which can hold the highest address of the image and the start address. the gaps between the
+    segments are not written.
+
+    :param image: image to write
+    :param fp: file object opened in binary mode
+    :param start: start address, written in the termination record (0 if None)
+    :param record_size: maximum number of data bytes per record
+    :param chunk_size: maximum number of bytes read from the image at once
+    :param header: content of the header record
+    """
+    start = 0 if start is None else start
+    highest = max(image.address + max(len(image) - 1, 0), start)
+    address_size = 2 if highest <= 0xFFFF else 3 if highest <= 0xFFFFFF else 4
+    if not 0 < record_size <= 0xFF - address_size - 1:
+        raise ValueError('invalid record size {}'.format(record_size))
+    data_type, termination_type = {2: ('1', '9'), 3: ('2', '8'), 4: ('3', '7')}[address_size]
+    fp.write(_srec_record('0', 0x0000, 2, header).encode('ascii'))
+    for address, data in _iter_pieces(image, chunk_size):
+        text = list()
+        for offset, count, size in _iter_groups(data, record_size):
+            columns = [bytes((address_size + size + 1,)) * count]
+            columns.extend(_address_columns(address + offset, count, size, address_size))
+            columns.extend(data[offset + i:offset + count * size:size] for i in range(size))
+            text.append(_encode_records('S' + data_type, columns, _INVERT))
+        fp.write(''.join(text).encode('ascii'))
+    fp.write(_srec_record(termination_type, start, address_size, b'').encode('ascii'))
+
+
+def _srec_record(record_type: str, address: int, address_size: int, data: bytes) -> str:
+    record = bytes((address_size + len(data) + 1,)) + address.to_bytes(address_size, 'big') + data
+    return _encode_records('S' + record_type, [record[i:i + 1] for i in range(len(record))], _INVERT)
+
+
+def write(image: Image, fp: typing.BinaryIO, output_format: str, **kwargs):
+    """
+    writes an image to a file object in the specified format.
+
+    :param image: image to write
+    :param fp: file object opened in binary mode
+    :param output_format: one of FORMATS
+    :param kwargs: arguments of the writer of the format (see write_binary, write_ihex and write_srec)
+    """
+    if output_format not in FORMATS:
+        raise ValueError('unknown output format {}'.format(output_format))
+    dict(binary=write_binary, ihex=write_ihex, srec=write_srec)[output_format](image, fp, **kwargs)
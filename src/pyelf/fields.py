@@ -0,0 +1,151 @@
+"""
+:file: fields.py
+:author: Guillaume Sottas
+:date: 18/10/2026
+"""
+import array
+import itertools
+import typing
+
+from pyelf.model import Array, Structure, Union, unalias
+
+
+class FieldTable(object):
+    """
+    table of the fields of the variables which can not be split further (base types, enumerations, pointers, bit
+    fields and elements of arrays of them), stored column by column.
+
+    for each field, the paths list holds its path (for instance 'var.member[2].value'), the addresses and sizes arrays
+    its address and size (the size of the storage unit for the bit fields), the type_ids array the index of its type
+    in the types list, and the bit_offsets and bit_sizes arrays its DW_AT_bit_offset and DW_AT_bit_size (-1 if it is
+    not a bit field). the fields of a variable are stored in declaration order, the members of the unions all being
+    stored. the arrays can be handed over without copy to any library supporting the buffer protocol.
+
+    the layout of each type (relative paths, offsets, sizes, types and bits of its fields) is computed once, and the
+    rows of a variable are then the layout of its type, shifted by its address and prefixed by its name.
+    """
+
+    def __init__(self,
+                 paths: typing.List[str],
+                 addresses: typing.Iterable[int],
+                 sizes: typing.Iterable[int],
+                 type_ids: typing.Iterable[int],
+                 types: typing.List[typing.Any],
+                 bit_offsets: typing.Iterable[int],
+                 bit_sizes: typing.Iterable[int]):
+        self.paths = paths
+        self.addresses = array.array('Q', addresses)
+        self.sizes = array.array('I', sizes)
+        self.type_ids = array.array('i', type_ids)
+        self.types = types
+        self.bit_offsets = array.array('h', bit_offsets)
+        self.bit_sizes = array.array('h', bit_sizes)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __getitem__(self, index: int) -> typing.Tuple[str, int, int, typing.Any, int, int]:
+        """
+        returns a tuple containing the path, the address, the size, the type, the bit offset and the bit size of a
+        field.
+        """
+        return (self.paths[index], self.addresses[index], self.sizes[index], self.types[self.type_ids[index]],
+                self.bit_offsets[index], self.bit_sizes[index])
+
+    def take(self, indexes: typing.Iterable[int]) -> 'FieldTable':
+        """
+        returns the table made of the specified rows, which share the types list of this table.
+
+        :param indexes: indexes of the rows, in the order of the new table
+        """
+        indexes = list(indexes)
+        return FieldTable([self.paths[i] for i in indexes],
+                          [self.addresses[i] for i in indexes],
+                          [self.sizes[i] for i in indexes],
+                          [self.type_ids[i] for i in indexes],
+                          self.types,
+                          [self.bit_offsets[i] for i in indexes],
+                          [self.bit_sizes[i] for i in indexes])
+
+    @classmethod
+    def from_variables(cls, variables: typing.Iterable[typing.Any], sizeof: typing.Callable[[typing.Any], int]):
+        """
+        creates the table of the fields of several variables.
+
+        :param variables: variables, in the order of the table
+        :param sizeof: function returning the size of a type, in [byte]
+        """
+        builder = _LayoutBuilder(sizeof)
+        paths, addresses, sizes, type_ids, bit_offsets, bit_sizes = list(), list(), list(), list(), list(), list()
+        for variable in variables:
+            if variable.address is None:
+                continue
+            suffixes, offsets, layout_sizes, layout_type_ids, layout_bit_offsets, layout_bit_sizes = \
+                builder.layout(variable.type)
+            paths.extend([variable.name + suffix for suffix in suffixes])
+            addresses.extend([variable.address + offset for offset in offsets])
+            sizes.extend(layout_sizes)
+            type_ids.extend(layout_type_ids)
+            bit_offsets.extend(layout_bit_offsets)
+            bit_sizes.extend(layout_bit_sizes)
+        return cls(paths, addresses, sizes, type_ids, builder.types, bit_offsets, bit_sizes)
+
+
+class _LayoutBuilder(object):
+    """
+    computes and keeps the layout of the types, as a tuple containing the path suffixes, the offsets, the sizes, the
+    type indexes, the bit offsets and the bit sizes of their fields.
+    """
+
+    def __init__(self, sizeof: typing.Callable[[typing.Any], int]):
+        self._sizeof = sizeof
+        self._layouts = dict()
+        self._type_ids = dict()
+        self.types = list()
+
+    def _type_id(self, t) -> int:
+        if t not in self._type_ids:
+            self._type_ids[t] = len(self.types)
+            self.types.append(t)
+        return self._type_ids[t]
+
+    def layout(self, t) -> typing.Tuple[list, list, list, list, list, list]:
+        t = unalias(t)
+        if t not in self._layouts:
+            self._layouts[t] = self._compute(t)
+        return self._layouts[t]
+
+    def _compute(self, t) -> typing.Tuple[list, list, list, list, list, list]:
+        columns = (list(), list(), list(), list(), list(), list())
+        if isinstance(t, Structure) and t.fields:
+            for field in t.fields:
+                if field.bit_size is not None:
+                    unit = unalias(field.type)
+                    self._append(columns, ('.' + field.name,), (field.offset,), (self._sizeof(unit),),
+                                 (self._type_id(unit),), (field.bit_offset or 0,), (field.bit_size,))
+                else:
+                    self._extend(columns, '.' + field.name, field.offset, self.layout(field.type))
+        elif isinstance(t, Union) and t.members:
+            for member in t.members:
+                self._extend(columns, '.' + member.name, 0, self.layout(member.type))
+        elif isinstance(t, Array) and t.dimension and self._sizeof(t.type):
+            element_size = self._sizeof(t.type)
+            element = self.layout(t.type)
+            positions = itertools.product(*(range(dimension + 1) for dimension in t.dimension))
+            for index, position in enumerate(positions):
+                self._extend(columns, ''.join('[{}]'.format(i) for i in position), index * element_size, element)
+        else:
+            self._append(columns, ('',), (0,), (self._sizeof(t),), (self._type_id(t),), (-1,), (-1,))
+        return columns
+
+    @staticmethod
+    def _append(columns: tuple, *values: typing.Iterable[typing.Any]):
+        for column, value in zip(columns, values):
+            column.extend(value)
+
+    @staticmethod
+    def _extend(columns: tuple, prefix: str, offset: int, layout: tuple):
+        suffixes, offsets, sizes, type_ids, bit_offsets, bit_sizes = layout
+        columns[0].extend([prefix + suffix for suffix in suffixes])
+        columns[1].extend([offset + o for o in offsets])
+        _LayoutBuilder._append(columns[2:], sizes, type_ids, bit_offsets, bit_sizes)
@@ -0,0 +1,158 @@
+"""
+:file: image.py
+:author: Guillaume Sottas
+:date: 18/10/2026
+"""
+import typing
+
+from pyelf.index import IntervalIndex
+
+
+class Image(object):
+    """
+    loadable image made of the content of several segments, placed at their address relative to the lowest one. the
+    gaps between the segments are filled with a fill byte.
+
+    the content of the segments is not copied until the image is requested as a whole (see view), and the write
+    method writes the image to a file object segment by segment, without building it in memory.
+    """
+
+    def __init__(self,
+                 segments: typing.Iterable[typing.Tuple[int, typing.Union[bytes, memoryview]]],
+                 fill: int = 0x00,
+                 address: typing.Union[int, None] = None):
+        """
+        :param segments: tuples containing the address and the content of each segment. the empty segments (.bss, for
+        instance) are ignored
+        :param fill: value of the bytes between the segments
+        :param address: address of the first byte of the image (the lowest address of a non-empty segment if None)
+        """
+        if not 0x00 <= fill <= 0xFF:
+            raise ValueError('invalid fill byte {}'.format(fill))
+        views = ((a, memoryview(d).cast('B')) for a, d in segments)
+        self._segments = sorted(((a, v) for a, v in views if len(v)), key=lambda s: s[0])
+        if address is None:
+            address = self._segments[0][0] if self._segments else 0
+        if self._segments and self._segments[0][0] < address:
+            raise ValueError('segment at 0x{:X} below image address 0x{:X}'.format(self._segments[0][0], address))
+        self._address = address
+        self._size = max((a + len(d) - address for a, d in self._segments), default=0)
+        self._fill = fill
+        self._buffer = None
+
+    @property
+    def address(self) -> int:
+        return self._address
+
+    @property
+    def fill(self) -> int:
+        return self._fill
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def segments(self) -> typing.List[typing.Tuple[int, memoryview]]:
+        """
+        returns tuples containing the address and a view on the content of each segment, sorted by address.
+        """
+        return list(self._segments)
+
+    @property
+    def view(self) -> memoryview:
+        """
+        returns a read-only view on the image. the image is built in a single buffer the first time it is requested,
+        and then kept.
+        """
+        if self._buffer is None:
+            self._buffer = bytearray((self.fill,)) * self._size
+            for address, data in self.chunks(max(1, self._size)):
+                self._buffer[address - self.address:address - self.address + len(data)] = data
+        return memoryview(self._buffer).toreadonly()
+
+    def tobytes(self) -> bytes:
+        return self.view.tobytes()
+
+    def chunks(self, chunk_size: int = 1 << 16) -> typing.Iterator[typing.Tuple[int, memoryview]]:
+        """
+        returns an iterator on the content of the image, split into chunks of at most chunk_size bytes. each chunk is
+        returned with its address. the gaps between the segments are not returned.
+
+        :param chunk_size: maximum size of a chunk, in [byte]
+        """
+        end = self.address
+        for address, data in self._segments:
+            # overlapping segments are written once, the first one taking precedence.
+            start = max(0, end - address)
+            for offset in range(start, len(data), chunk_size):
+                yield address + offset, data[offset:offset + chunk_size]
+            end = max(end, address + len(data))
+
+    def write(self, fp: typing.BinaryIO, chunk_size: int = 1 << 16):
+        """
+        writes the image to a file object, segment by segment, in chunks of at most chunk_size bytes.
+
+        :param fp: file object opened in binary mode
+        :param chunk_size: maximum size of a chunk, in [byte]
+        """
+        position = self.address
+        gap = memoryview(bytes((self.fill,)) * chunk_size)
+        for address, data in self.chunks(chunk_size):
+            while position < address:
+                size = min(chunk_size, address - position)
+                fp.write(gap[:size])
+                position += size
+            fp.write(data)
+            position = address + len(data)
+
+
+class MemoryMap(object):
+    """
+    address space described by the regions of an ELF file (loadable segments, or allocated sections for the files
+    without segments). each region is a range of addresses, whose beginning is backed by a part of the file and whose
+    end (.bss, for instance) reads as zeros.
+    """
+
+    def __init__(self, stream, regions: typing.Iterable[typing.Tuple[int, int, int, int]]):
+        """
+        :param stream: stream of the file, providing a view method (see MappedStream)
+        :param regions: tuples containing the address, the size, the offset in the file and the size in the file of
+        each region
+        """
+        self._stream = stream
+        self._index = IntervalIndex((r[0], r[0] + r[1], r) for r in regions)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def read(self, address: int, size: int) -> memoryview:
+        """
+        returns a read-only view on the content of the memory in the range [address, address + size). the view is
+        taken on the file without copy if the range lies in the part of a region backed by the file, the content is
+        copied otherwise.
+
+        :param address: address of the first byte
+        :param size: number of bytes
+        :raise ValueError: if a part of the range is not in any region
+        """
+        if size < 0:
+            raise ValueError('negative size {}'.format(size))
+        regions = self._index.at(address)
+        if regions:
+            start, region_size, offset, file_size = regions[0]
+            if address + size <= start + min(region_size, file_size):
+                return self._stream.view(offset + address - start, size)
+        data = bytearray(size)
+        position = address
+        while position < address + size:
+            regions = self._index.at(position)
+            if not regions:
+                raise ValueError('address 0x{:X} not mapped'.format(position))
+            start, region_size, offset, file_size = regions[0]
+            end = min(start + region_size, address + size)
+            file_end = min(start + min(region_size, file_size), end)
+            if position < file_end:
+                data[position - address:file_end - address] = self._stream.view(offset + position - start,
+                                                                                 file_end - position)
+            position = end
+        return memoryview(data).toreadonly()
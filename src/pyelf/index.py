@@ -0,0 +1,201 @@
+"""
+:file: index.py
+:author: Guillaume Sottas
+:date: 18/10/2026
+"""
+import bisect
+import fnmatch
+import re
+import typing
+
+
+class IntervalIndex(object):
+    """
+    static index of half-open intervals [start, end), each associated to a value.
+
+    the intervals are stored in a centered interval tree: each node holds the intervals containing its center, sorted
+    by start and by end address, and the intervals entirely before or after the center are stored in its left or right
+    subtree. an address is looked up by walking down a single path of the tree, and selecting the intervals of each
+    node by bisection, so that a query is O(log n + k log k), k being the number of intervals found, whatever the
+    intervals look like (a long interval covering many others does not slow the queries down). the subtrees of a few
+    intervals are stored as leaves, whose intervals are all checked.
+    """
+
+    _LEAF_SIZE = 16
+
+    def __init__(self, intervals: typing.Iterable[typing.Tuple[int, int, typing.Any]]):
+        """
+        :param intervals: tuples containing the start address, the end address and the value of each interval. empty
+        intervals are ignored
+        """
+        intervals = sorted((i for i in intervals if i[1] > i[0]), key=lambda i: (i[0], i[1]))
+        self._starts = [i[0] for i in intervals]
+        self._ends = [i[1] for i in intervals]
+        self._values = [i[2] for i in intervals]
+        # the nodes are stored column by column. the intervals are designated by their position in the lists above.
+        self._centers = list()
+        self._node_starts = list()
+        self._node_positions_by_start = list()
+        self._node_ends = list()
+        self._node_positions_by_end = list()
+        self._lefts = list()
+        self._rights = list()
+        self._root = self._build(list(range(len(intervals))))
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def _build(self, positions: typing.List[int]) -> int:
+        """
+        builds the subtree of the intervals at the specified positions (sorted), and returns the index of its root, or
+        -1 if there is no interval.
+        """
+        if not positions:
+            return -1
+        node = len(self._centers)
+        if len(positions) <= self._LEAF_SIZE:
+            self._centers.append(None)
+            self._node_positions_by_start.append(positions)
+            for column in (self._node_starts, self._node_ends, self._node_positions_by_end, self._lefts, self._rights):
+                column.append(None)
+            return node
+        center = self._starts[positions[len(positions) // 2]]
+        # the positions being sorted by start address, the intervals starting after the center are the last ones.
+        split = bisect.bisect_right(positions, bisect.bisect_right(self._starts, center) - 1)
+        ends = self._ends
+        left, inside = list(), list()
+        for p in positions[:split]:
+            (left if ends[p] <= center else inside).append(p)
+        by_end = sorted(inside, key=ends.__getitem__)
+        self._centers.append(center)
+        self._node_starts.append([self._starts[p] for p in inside])
+        self._node_positions_by_start.append(inside)
+        self._node_ends.append([self._ends[p] for p in by_end])
+        self._node_positions_by_end.append(by_end)
+        self._lefts.append(-1)
+        self._rights.append(-1)
+        # the interval in the middle contains the center, so that each subtree holds less than half of the intervals.
+        self._lefts[node] = self._build(left)
+        self._rights[node] = self._build(positions[split:])
+        return node
+
+    def _stab(self, address: int) -> typing.List[int]:
+        """
+        returns the positions of the intervals containing an address, sorted.
+        """
+        positions = list()
+        node = self._root
+        while node >= 0:
+            center = self._centers[node]
+            if center is None:
+                positions.extend(p for p in self._node_positions_by_start[node]
+                                 if self._starts[p] <= address < self._ends[p])
+                break
+            elif address < center:
+                # the intervals of the node end after the center, they contain the address if they start before it.
+                count = bisect.bisect_right(self._node_starts[node], address)
+                positions.extend(self._node_positions_by_start[node][:count])
+                node = self._lefts[node]
+            else:
+                # the intervals of the node start before the center, they contain the address if they end after it.
+                first = bisect.bisect_right(self._node_ends[node], address)
+                positions.extend(self._node_positions_by_end[node][first:])
+                node = self._rights[node] if address > center else -1
+        positions.sort()
+        return positions
+
+    def at(self, address: int) -> typing.List[typing.Any]:
+        """
+        returns the values of the intervals containing the specified address, sorted by start address.
+        """
+        return [self._values[p] for p in self._stab(address)]
+
+    def overlapping(self, start: int, end: int) -> typing.List[typing.Any]:
+        """
+        returns the values of the intervals overlapping the range [start, end), sorted by start address.
+        """
+        if end <= start:
+            return list()
+        # the intervals overlapping the range either contain its start, or start within the range.
+        positions = self._stab(start)
+        positions.extend(range(bisect.bisect_right(self._starts, start), bisect.bisect_left(self._starts, end)))
+        return [self._values[p] for p in positions]
+
+
+class NameIndex(object):
+    """
+    static index of names, sorted so that the names starting with a prefix are found by bisection.
+
+    the glob patterns are matched against the names starting with their literal prefix only (the characters before
+    the first wildcard), or, for the patterns starting with a wildcard, against the names ending with their literal
+    suffix, found by bisection in the sorted reversed names. the regular expressions anchored with '^' are matched
+    against the names starting with their literal prefix only.
+    """
+
+    MODES = ('prefix', 'glob', 'regex')
+
+    def __init__(self, names: typing.Iterable[str]):
+        """
+        :param names: indexed names. the duplicates are ignored
+        """
+        self._names = sorted(set(names))
+        self._reversed_names = None
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @staticmethod
+    def _range(names: typing.List[str], prefix: str) -> typing.List[str]:
+        if not prefix:
+            return names
+        end = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return names[bisect.bisect_left(names, prefix):bisect.bisect_left(names, end)]
+
+    def prefix(self, prefix: str) -> typing.List[str]:
+        """
+        returns the names starting with a prefix, sorted.
+        """
+        return self._range(self._names, prefix)
+
+    def glob(self, pattern: str) -> typing.List[str]:
+        """
+        returns the names matching a glob pattern (see fnmatch, case-sensitive), sorted.
+        """
+        match = re.compile(fnmatch.translate(pattern)).match
+        # the literal prefix ends with the first wildcard, the literal suffix starts after the last wildcard or the
+        # last end of a set of characters.
+        prefix = re.split(r'[*?\[]', pattern)[0]
+        suffix = re.split(r'[*?\]]', pattern)[-1]
+        if pattern == prefix + '*':
+            return self.prefix(prefix)
+        elif prefix or not suffix:
+            return [n for n in self.prefix(prefix) if match(n)]
+        if self._reversed_names is None:
+            self._reversed_names = sorted(n[::-1] for n in self._names)
+        return sorted(n[::-1] for n in self._range(self._reversed_names, suffix[::-1]) if match(n[::-1]))
+
+    def regex(self, pattern: str) -> typing.List[str]:
+        """
+        returns the names in which a regular expression matches (see re.search), sorted.
+        """
+        try:
+            search = re.compile(pattern).search
+        except re.error as e:
+            raise ValueError('invalid regular expression {} ({})'.format(pattern, e))
+        prefix = ''
+        if pattern.startswith('^') and '|' not in pattern:
+            prefix = re.match(r'\w*', pattern[1:]).group()
+            if prefix and pattern[1 + len(prefix):2 + len(prefix)] in ('*', '?', '{'):
+                prefix = prefix[:-1]
+        return [n for n in self.prefix(prefix) if search(n)]
+
+    def find(self, pattern: str, mode: str = 'glob') -> typing.List[str]:
+        """
+        returns the names matching a pattern, sorted.
+
+        :param pattern: prefix, glob pattern or regular expression
+        :param mode: one of MODES
+        """
+        if mode not in self.MODES:
+            raise ValueError('unknown search mode {}'.format(mode))
+        return getattr(self, mode)(pattern)
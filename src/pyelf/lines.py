@@ -0,0 +1,269 @@
+"""
+:file: lines.py
+:author: Guillaume Sottas
+:date: 18/10/2026
+"""
+import array
+import bisect
+import heapq
+import itertools
+import typing
+
+from elftools.common.exceptions import DWARFError
+from elftools.dwarf.descriptions import describe_form_class
+from elftools.dwarf.ranges import BaseAddressEntry
+
+from pyelf.index import IntervalIndex
+
+
+class LineTable(object):
+    """
+    table of the source lines of the code of an ELF file, stored as sorted arrays of addresses, file indexes and line
+    numbers.
+
+    the rows of the line programs describe address ranges which may overlap (several compilation units may describe
+    the same code, or a line program may describe an address several times). the table is built from these ranges
+    by a sweep over their boundaries, which keeps for each address the range with the lowest priority. the table is
+    therefore made of non-overlapping segments, and a lookup is a bisection.
+    """
+
+    def __init__(self, files: typing.Iterable[str], ranges: typing.Iterable[typing.Tuple[int, int, tuple, int, int]]):
+        """
+        :param files: paths of the source files
+        :param ranges: tuples containing the start address, the end address, the priority, the index of the source
+        file and the line number of each range. where ranges overlap, the one with the lowest priority is kept
+        """
+        self._files = list(files)
+        self._addresses = array.array('Q')
+        self._file_indexes = array.array('i')
+        self._lines = array.array('I')
+        ranges = sorted(r for r in ranges if r[1] > r[0])
+        boundaries = sorted(set(itertools.chain.from_iterable((r[0], r[1]) for r in ranges)))
+        active = list()
+        position = 0
+        for boundary in boundaries:
+            while position < len(ranges) and ranges[position][0] == boundary:
+                start, end, priority, file_index, line = ranges[position]
+                heapq.heappush(active, (priority, end, file_index, line))
+                position += 1
+            while active and active[0][1] <= boundary:
+                heapq.heappop(active)
+            file_index, line = (active[0][2], active[0][3]) if active else (-1, 0)
+            if self._addresses and self._file_indexes[-1] == file_index and self._lines[-1] == line:
+                continue
+            self._addresses.append(boundary)
+            self._file_indexes.append(file_index)
+            self._lines.append(line)
+
+    def __len__(self) -> int:
+        return len(self._addresses)
+
+    @property
+    def files(self) -> typing.List[str]:
+        """
+        returns the paths of the source files, in the order of their indexes.
+        """
+        return self._files
+
+    @classmethod
+    def from_dwarf_info(cls, dwarf_info) -> 'LineTable':
+        """
+        creates the table from the line programs of the compilation units. the source file of each address is the
+        file of its compilation unit. where the ranges overlap, the first compilation unit has precedence, and the
+        last row has precedence within a compilation unit.
+
+        :param dwarf_info: DWARF information of the ELF file
+        """
+        files = list()
+        ranges = list()
+        for cu in dwarf_info.iter_CUs():
+            try:
+                line_program = dwarf_info.line_program_for_CU(cu)
+            except DWARFError:
+                continue
+            if line_program is None:
+                continue
+            file_index = len(files)
+            files.append(cu.get_top_DIE().get_full_path())
+            previous = None
+            for row, entry in enumerate(line_program.get_entries()):
+                if entry.state is None:
+                    continue
+                if previous is not None:
+                    ranges.append((previous.address, entry.state.address, (file_index, -row), file_index,
+                                   previous.line))
+                previous = None if entry.state.end_sequence else entry.state
+        return cls(files, ranges)
+
+    def lookup(self, address: int) -> typing.Union[typing.Tuple[str, int], None]:
+        """
+        returns a tuple containing the path of the source file and the line number of an address, or None if the
+        address is not described by the table.
+
+        :param address: requested address
+        """
+        position = bisect.bisect_right(self._addresses, address) - 1
+        if position < 0 or self._file_indexes[position] < 0:
+            return None
+        return self._files[self._file_indexes[position]], self._lines[position]
+
+    def lookup_sorted(self, addresses: typing.Iterable[int]) -> typing.Iterator[typing.Tuple[int, int]]:
+        """
+        returns an iterator on the index of the source file and the line number of each address, the index being -1
+        for the addresses not described by the table. the addresses must be sorted in increasing order, each
+        bisection then starts at the position found for the previous address.
+
+        :param addresses: requested addresses, in increasing order
+        """
+        position = 0
+        for address in addresses:
+            position = bisect.bisect_right(self._addresses, address, position)
+            if position == 0 or self._file_indexes[position - 1] < 0:
+                yield -1, 0
+            else:
+                yield self._file_indexes[position - 1], self._lines[position - 1]
+
+
+class FunctionTable(object):
+    """
+    index of the address ranges of the functions of an ELF file, including the functions inlined in other functions.
+
+    the ranges are read from the DW_TAG_subprogram and DW_TAG_inlined_subroutine DIEs, either from their
+    DW_AT_low_pc and DW_AT_high_pc attributes or from their DW_AT_ranges attribute, so that the functions whose code
+    is not contiguous are found as well.
+    """
+
+    _TAGS = ('DW_TAG_subprogram', 'DW_TAG_inlined_subroutine')
+
+    def __init__(self, ranges: typing.Iterable[typing.Tuple[int, int, typing.Tuple[int, int, str]]]):
+        """
+        :param ranges: tuples containing the start address and the end address of each range, and a tuple containing
+        the offset of the DIE of the function, the offset of its compilation unit and its name
+        """
+        self._index = IntervalIndex(ranges)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @classmethod
+    def from_dwarf_info(cls, dwarf_info) -> 'FunctionTable':
+        """
+        creates the table from the DIEs of all the compilation units.
+
+        :param dwarf_info: DWARF information of the ELF file
+        """
+        range_lists = dwarf_info.range_lists()
+        ranges = list()
+        for cu in dwarf_info.iter_CUs():
+            top = cu.get_top_DIE()
+            base = top.attributes['DW_AT_low_pc'].value if 'DW_AT_low_pc' in top.attributes else 0
+            for die in cu.iter_DIEs():
+                if die.tag not in cls._TAGS:
+                    continue
+                name = cls._get_name(die)
+                if name is None:
+                    continue
+                for start, end in cls._get_ranges(die, range_lists, base):
+                    ranges.append((start, end, (die.offset, cu.cu_offset, name)))
+        return cls(ranges)
+
+    @staticmethod
+    def _get_name(die) -> typing.Union[str, None]:
+        """
+        returns the name of a function, looked up through the abstract origin or the specification of the DIE if the
+        DIE itself has no name (concrete instances of inlined functions, for instance).
+        """
+        while 'DW_AT_name' not in die.attributes:
+            for attribute in ('DW_AT_abstract_origin', 'DW_AT_specification'):
+                if attribute in die.attributes:
+                    die = die.get_DIE_from_attribute(attribute)
+                    break
+            else:
+                return None
+        return die.attributes['DW_AT_name'].value.decode()
+
+    @staticmethod
+    def _get_ranges(die, range_lists, base: int) -> typing.List[typing.Tuple[int, int]]:
+        attributes = die.attributes
+        if 'DW_AT_low_pc' in attributes and 'DW_AT_high_pc' in attributes:
+            low_pc = attributes['DW_AT_low_pc'].value
+            high_pc = attributes['DW_AT_high_pc']
+            form_class = describe_form_class(high_pc.form)
+            if form_class == 'address':
+                return [(low_pc, high_pc.value)]
+            elif form_class == 'constant':
+                return [(low_pc, low_pc + high_pc.value)]
+        elif 'DW_AT_ranges' in attributes and range_lists is not None:
+            ranges = list()
+            for entry in range_lists.get_range_list_at_offset(attributes['DW_AT_ranges'].value, cu=die.cu):
+                if isinstance(entry, BaseAddressEntry):
+                    base = entry.base_address
+                elif entry.is_absolute:
+                    ranges.append((entry.begin_offset, entry.end_offset))
+                else:
+                    ranges.append((base + entry.begin_offset, base + entry.end_offset))
+            return ranges
+        return []
+
+    def lookup(self, address: int) -> typing.List[str]:
+        """
+        returns the names of the functions containing an address, starting with the function whose code contains
+        the address, followed by the functions inlined in it, down to the innermost one. the list is empty if no
+        function contains the address.
+
+        :param address: requested address
+        """
+        functions = sorted(self._index.at(address))
+        return [name for offset, cu_offset, name in functions if cu_offset == functions[0][1]]
+
+
+class SourceInfoTable(object):
+    """
+    source information of several addresses, stored column by column.
+
+    the paths of the source files and the names of the functions are stored once, in the files and functions lists.
+    for each address, the file_ids and function_ids arrays hold the index of its source file and function in these
+    lists (or -1 if not known), and the lines array its line number (numbered as by ElfFile.get_source_info, -1 if
+    not known). the arrays can be handed over without copy to any library supporting the buffer protocol.
+    """
+
+    def __init__(self, line_table: LineTable, function_table: FunctionTable, addresses: typing.Iterable[int]):
+        """
+        :param line_table: table of the source lines
+        :param function_table: table of the functions
+        :param addresses: requested addresses
+        """
+        try:
+            addresses = memoryview(addresses).tolist()
+        except TypeError:
+            addresses = list(addresses)
+        unique = sorted(set(addresses))
+        self.files = line_table.files
+        self.functions = list()
+        function_ids = dict()
+        resolved = dict()
+        for address, (file_id, line) in zip(unique, line_table.lookup_sorted(unique)):
+            functions = function_table.lookup(address)
+            function_id = -1
+            if functions:
+                if functions[0] not in function_ids:
+                    function_ids[functions[0]] = len(self.functions)
+                    self.functions.append(functions[0])
+                function_id = function_ids[functions[0]]
+            resolved[address] = (file_id, line - 1 if file_id >= 0 else -1, function_id)
+        columns = tuple(zip(*(resolved[address] for address in addresses))) or ((), (), ())
+        self.file_ids = array.array('i', columns[0])
+        self.lines = array.array('i', columns[1])
+        self.function_ids = array.array('i', columns[2])
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def __getitem__(self, index: int) -> typing.Tuple[typing.Union[str, None], int, typing.Union[str, None]]:
+        """
+        returns the source information of an address, in the form returned by ElfFile.get_source_info.
+        """
+        file_id, function_id = self.file_ids[index], self.function_ids[index]
+        return (self.files[file_id] if file_id >= 0 else None,
+                self.lines[index],
+                self.functions[function_id] if function_id >= 0 else None)
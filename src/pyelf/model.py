@@ -0,0 +1,420 @@
+"""
+:file: model.py
+:author: Guillaume Sottas
+:date: 18/10/2026
+"""
+import abc
+import sys
+import typing
+
+from elftools.dwarf.enums import ENUM_DW_ATE
+
+FLOAT_ENCODING = ENUM_DW_ATE['DW_ATE_float']
+BOOLEAN_ENCODING = ENUM_DW_ATE['DW_ATE_boolean']
+SIGNED_ENCODINGS = frozenset((ENUM_DW_ATE['DW_ATE_signed'],
+                              ENUM_DW_ATE['DW_ATE_signed_char'],
+                              ENUM_DW_ATE['DW_ATE_signed_fixed']))
+
+
+class NamedProperty(abc.ABC):
+    __slots__ = ('_name',)
+
+    def __init__(self, name: str):
+        self._name = sys.intern(name)
+
+    @property
+    def name(self):
+        return self._name
+
+
+class TypedProperty(NamedProperty):
+    __slots__ = ('_type_name', '_type_offset', '_type', '_parent')
+
+    _UNRESOLVED = object()
+
+    def __init__(self, name: str, type_name: str, parent, type_offset: typing.Union[int, None] = None):
+        super().__init__(name)
+        self._type_name = sys.intern(type_name)
+        self._type_offset = type_offset
+        self._type = self._UNRESOLVED
+        self._parent = parent
+
+    @property
+    def type(self):
+        """
+        returns the type of the element. the type is looked up until it is resolved, and then kept: the name of an
+        unknown type or a declared-only structure or union may still be completed by a later compilation unit.
+        """
+        if self._type is not self._UNRESOLVED:
+            return self._type
+        t = self._parent.get_type_from_offset(self._type_offset, self._type_name)
+        if not (isinstance(t, str) or (isinstance(t, (Structure, Union)) and t.declaration)):
+            self._type = t
+        return t
+
+
+class BaseType(NamedProperty):
+    __slots__ = ('_size', '_encoding')
+
+    def __init__(self, name: str, size: int, encoding: typing.Union[int, None] = None):
+        super().__init__(name)
+        self._size = size
+        self._encoding = encoding
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def encoding(self) -> typing.Union[int, None]:
+        """
+        returns the encoding of the type (value of its DW_AT_encoding attribute, see DW_ATE_* constants), or None if
+        not known.
+        """
+        return self._encoding
+
+    def to_json(self, parents: typing.Union[typing.Set[int], None] = None):
+        return dict(_type=self.__class__.__name__, name=self.name, size=self.size)
+
+    def to_json_ref(self, _ref: typing.Callable[[typing.Any], typing.Any]):
+        return self.to_json()
+
+
+class TypedefType(TypedProperty):
+    __slots__ = ()
+
+    def __init__(self, name: str, type_name: str, parent, type_offset: typing.Union[int, None] = None):
+        super().__init__(name, type_name, parent, type_offset)
+
+    def to_json(self, parents: typing.Union[typing.Set[int], None] = None):
+        return dict(_type=self.__class__.__name__, name=self.name, type=self.type.to_json(parents))
+
+    def to_json_ref(self, ref: typing.Callable[[typing.Any], typing.Any]):
+        return dict(_type=self.__class__.__name__, name=self.name, type=ref(self.type))
+
+
+class Union(NamedProperty):
+    class Member(TypedProperty):
+        __slots__ = ()
+
+        def __init__(self, name: str, type_name: str, parent, type_offset: typing.Union[int, None] = None):
+            super().__init__(name, type_name, parent, type_offset)
+
+        def to_json(self, parents: typing.Union[typing.Set[int], None] = None):
+            return dict(_type=self.__class__.__name__, name=self.name, type=self.type.to_json(parents))
+
+        def to_json_ref(self, ref: typing.Callable[[typing.Any], typing.Any]):
+            return dict(_type=self.__class__.__name__, name=self.name, type=ref(self.type))
+
+    __slots__ = ('_size', '_members', '_declaration')
+
+    def __init__(self, name: str, size: int, members: typing.Tuple[Member], declaration: bool = False):
+        super().__init__(name)
+        self._size = size
+        self._members = members
+        self._declaration = declaration
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def declaration(self) -> bool:
+        """
+        returns True if the union is only declared (incomplete type, without size nor members).
+        """
+        return self._declaration
+
+    @property
+    def members(self):
+        return self._members
+
+    def to_json(self, parents: typing.Union[typing.Set[int], None] = None):
+        """
+        returns a dictionary describing the union. if the union is one of its own parents (through a pointer), its
+        members are omitted.
+
+        :param parents: identifiers of the structures and unions being serialized, used to break the cycles
+        """
+        parents = set() if parents is None else parents
+        if id(self) in parents:
+            return dict(_type=self.__class__.__name__, name=self.name, size=self.size)
+        parents.add(id(self))
+        try:
+            return dict(_type=self.__class__.__name__,
+                        name=self.name,
+                        size=self.size,
+                        members=[m.to_json(parents) for m in self.members])
+        finally:
+            parents.discard(id(self))
+
+    def to_json_ref(self, ref: typing.Callable[[typing.Any], typing.Any]):
+        """
+        returns a dictionary describing the union, in which the type of each member is replaced by the value returned
+        by ref for this type.
+        """
+        return dict(_type=self.__class__.__name__,
+                    name=self.name,
+                    size=self.size,
+                    members=[m.to_json_ref(ref) for m in self.members])
+
+
+class Structure(NamedProperty):
+    class Field(TypedProperty):
+        __slots__ = ('_offset', '_bit_offset', '_bit_size')
+
+        def __init__(self,
+                     name: str,
+                     type_name: str,
+                     parent,
+                     offset: int,
+                     bit_offset: typing.Union[int, None] = None,
+                     bit_size: typing.Union[int, None] = None,
+                     type_offset: typing.Union[int, None] = None):
+            super().__init__(name, type_name, parent, type_offset)
+            self._offset = offset
+            self._bit_offset = bit_offset
+            self._bit_size = bit_size
+
+        @property
+        def offset(self):
+            return self._offset
+
+        @property
+        def bit_offset(self):
+            return self._bit_offset
+
+        @property
+        def bit_size(self):
+            return self._bit_size
+
+        def to_json(self, parents: typing.Union[typing.Set[int], None] = None):
+            try:
+                return dict(_type=self.__class__.__name__,
+                            name=self.name,
+                            offset=self.offset,
+                            bit_offset=self.bit_offset,
+                            bit_size=self.bit_size,
+                            type=self.type.to_json(parents))
+            except AttributeError as e:
+                return None
+
+        def to_json_ref(self, ref: typing.Callable[[typing.Any], typing.Any]):
+            return dict(_type=self.__class__.__name__,
+                        name=self.name,
+                        offset=self.offset,
+                        bit_offset=self.bit_offset,
+                        bit_size=self.bit_size,
+                        type=ref(self.type))
+
+    """
+    represents a structure.
+    """
+
+    __slots__ = ('_size', '_fields', '_declaration')
+
+    def __init__(self, name: str, size: int, fields: typing.Tuple[Field], declaration: bool = False):
+        super().__init__(name)
+        self._size = size
+        self._fields = fields
+        self._declaration = declaration
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def declaration(self) -> bool:
+        """
+        returns True if the structure is only declared (incomplete type, without size nor fields).
+        """
+        return self._declaration
+
+    @property
+    def fields(self):
+        return self._fields
+
+    def to_json(self, parents: typing.Union[typing.Set[int], None] = None):
+        """
+        returns a dictionary describing the structure. if the structure is one of its own parents (through a pointer),
+        its fields are omitted.
+
+        :param parents: identifiers of the structures and unions being serialized, used to break the cycles
+        """
+        parents = set() if parents is None else parents
+        if id(self) in parents:
+            return dict(_type=self.__class__.__name__, name=self.name, size=self.size)
+        parents.add(id(self))
+        try:
+            return dict(_type=self.__class__.__name__,
+                        name=self.name,
+                        size=self.size,
+                        fields=[m.to_json(parents) for m in self.fields])
+        finally:
+            parents.discard(id(self))
+
+    def to_json_ref(self, ref: typing.Callable[[typing.Any], typing.Any]):
+        """
+        returns a dictionary describing the structure, in which the type of each field is replaced by the value
+        returned by ref for this type.
+        """
+        return dict(_type=self.__class__.__name__,
+                    name=self.name,
+                    size=self.size,
+                    fields=[m.to_json_ref(ref) for m in self.fields])
+
+
+class Enumeration(NamedProperty):
+    class Enumerator(NamedProperty):
+        __slots__ = ('_value',)
+
+        def __init__(self, name: str, value: int):
+            super().__init__(name)
+            self._value = value
+
+        @property
+        def value(self):
+            return self._value
+
+        def to_json(self, parents: typing.Union[typing.Set[int], None] = None):
+            return dict(_type=self.__class__.__name__, name=self.name, value=self.value)
+
+    __slots__ = ('_size', '_enumerators')
+
+    def __init__(self, name: str, size: int, enumerators: typing.Tuple[Enumerator]):
+        super().__init__(name)
+        self._size = size
+        self._enumerators = enumerators
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def enumerators(self):
+        return self._enumerators
+
+    def to_json(self, parents: typing.Union[typing.Set[int], None] = None):
+        return dict(_type=self.__class__.__name__,
+                    name=self.name,
+                    size=self.size,
+                    enumerators=[e.to_json() for e in self.enumerators])
+
+    def to_json_ref(self, _ref: typing.Callable[[typing.Any], typing.Any]):
+        return self.to_json()
+
+
+class Array(TypedProperty):
+    __slots__ = ('_dimension',)
+
+    def __init__(self,
+                 name: str,
+                 type_name: str,
+                 parent,
+                 dimension: typing.List[int],
+                 type_offset: typing.Union[int, None] = None):
+        super().__init__(name, type_name, parent, type_offset)
+        self._dimension = dimension
+
+    @property
+    def dimension(self):
+        return self._dimension
+
+    def to_json(self, parents: typing.Union[typing.Set[int], None] = None):
+        return dict(_type=self.__class__.__name__,
+                    name=self.name,
+                    type=self.type.to_json(parents),
+                    dimension=self.dimension)
+
+    def to_json_ref(self, ref: typing.Callable[[typing.Any], typing.Any]):
+        return dict(_type=self.__class__.__name__, name=self.name, type=ref(self.type), dimension=self.dimension)
+
+
+class Variable(TypedProperty):
+    """
+    represents a variable.
+    """
+
+    __slots__ = ('_address',)
+
+    def __init__(self, name: str, type_name: str, parent, address: int, type_offset: typing.Union[int, None] = None):
+        super().__init__(name, type_name, parent, type_offset)
+        self._address = address
+
+    @property
+    def address(self) -> int:
+        return self._address
+
+    def to_json(self, parents: typing.Union[typing.Set[int], None] = None):
+        return dict(_type=self.__class__.__name__,
+                    name=self.name,
+                    address=self.address,
+                    type=self.type.to_json(parents))
+
+    def to_json_ref(self, ref: typing.Callable[[typing.Any], typing.Any]):
+        """
+        returns a dictionary describing the variable, in which its type is replaced by the value returned by ref for
+        this type.
+        """
+        return dict(_type=self.__class__.__name__, name=self.name, address=self.address, type=ref(self.type))
+
+
+class Pointer(TypedProperty):
+    __slots__ = ()
+
+    def __init__(self, name, type_name: str, parent, type_offset: typing.Union[int, None] = None):
+        super().__init__(name, type_name, parent, type_offset)
+
+    def to_json(self, parents: typing.Union[typing.Set[int], None] = None):
+        return dict(_type=self.__class__.__name__, name=self.name, type=self.type.to_json(parents))
+
+    def to_json_ref(self, ref: typing.Callable[[typing.Any], typing.Any]):
+        return dict(_type=self.__class__.__name__, name=self.name, type=ref(self.type))
+
+
+class Constant(TypedProperty):
+    __slots__ = ()
+
+    def __init__(self, name: str, type_name: str, parent, type_offset: typing.Union[int, None] = None):
+        super().__init__(name, type_name, parent, type_offset)
+
+    def to_json(self, parents: typing.Union[typing.Set[int], None] = None):
+        return dict(_type=self.__class__.__name__, name=self.name, type=self.type.to_json(parents))
+
+    def to_json_ref(self, ref: typing.Callable[[typing.Any], typing.Any]):
+        return dict(_type=self.__class__.__name__, name=self.name, type=ref(self.type))
+
+
+class SubRoutine(object):
+    __slots__ = ('_name',)
+
+    def __init__(self, name: str):
+        self._name = sys.intern(name)
+
+    @property
+    def name(self):
+        return self._name
+
+    def to_json(self, parents: typing.Union[typing.Set[int], None] = None):
+        return dict(_type=self.__class__.__name__, name=self.name)
+
+    def to_json_ref(self, _ref: typing.Callable[[typing.Any], typing.Any]):
+        return self.to_json()
+
+
+def unalias(t):
+    """
+    returns the type designated by a type definition or a constant, or the type itself for the other types.
+    """
+    while isinstance(t, (TypedefType, Constant)):
+        t = t.type
+    return t
+
+
+def is_signed(t) -> bool:
+    """
+    returns True if the values of a base type or of an enumeration are signed.
+    """
+    if isinstance(t, Enumeration):
+        return any(e.value < 0 for e in t.enumerators)
+    return isinstance(t, BaseType) and t.encoding in SIGNED_ENCODINGS
@@ -3,15 +3,29 @@
 :author: Guillaume Sottas
 :date: 27/06/2018
 """
-import abc
+import concurrent.futures
+import itertools
 import typing
 
-from elftools.common.exceptions import DWARFError
-from elftools.dwarf.descriptions import describe_form_class
+from elftools.elf.constants import SH_FLAGS
 from elftools.elf.elffile import ELFFile as ELF
-from elftools.elf.sections import Symbol as ElfSymbol
+from elftools.elf.sections import Symbol as ElfSymbol, SymbolTableSection
 from elftools.dwarf.die import DIE
 
+from pyelf.cache import RecordCache
+from pyelf.codec import Codec
+from pyelf.diff import diff
+from pyelf.dtypes import to_dtype
+from pyelf.fields import FieldTable
+from pyelf.image import Image, MemoryMap
+from pyelf.index import IntervalIndex, NameIndex
+from pyelf.lines import FunctionTable, LineTable, SourceInfoTable
+from pyelf.model import (Array, BaseType, Constant, Enumeration, NamedProperty, Pointer, Structure, SubRoutine,
+                          TypedefType, TypedProperty, Union, Variable)
+from pyelf.paths import PathResolver
+from pyelf.stream import MappedStream
+from pyelf.symtab import STT_FILE, STT_OBJECT, SymbolTable
+
 
 class Address(int):
     """
@@ -48,224 +62,6 @@ class Symbol(ElfSymbol):
         return self.entry.st_value
 
 
-class NamedProperty(abc.ABC):
-    def __init__(self, name: str):
-        self._name = name
-
-    @property
-    def name(self):
-        return self._name
-
-
-class TypedProperty(NamedProperty):
-    def __init__(self, name: str, type_name: str, parent):
-        super().__init__(name)
-        self._type_name = type_name
-        self._parent = parent
-
-    @property
-    def type(self):
-        return self._parent.get_type_from_type_name(self._type_name)
-
-
-class BaseType(NamedProperty):
-    def __init__(self, name: str, size: int):
-        super().__init__(name)
-        self._size = size
-
-    @property
-    def size(self):
-        return self._size
-
-    def to_json(self):
-        return dict(_type=self.__class__.__name__, name=self.name, size=self.size)
-
-
-class TypedefType(TypedProperty):
-    def __init__(self, name: str, type_name: str, parent):
-        super().__init__(name, type_name, parent)
-
-    def to_json(self):
-        return dict(_type=self.__class__.__name__, name=self.name, type=self.type.to_json())
-
-
-class Union(NamedProperty):
-    class Member(TypedProperty):
-        def __init__(self, name: str, type_name: str, parent):
-            super().__init__(name, type_name, parent)
-
-        def to_json(self):
-            return dict(_type=self.__class__.__name__, name=self.name, type=self.type.to_json())
-
-    def __init__(self, name: str, size: int, members: typing.Tuple[Member]):
-        super().__init__(name)
-        self._size = size
-        self._members = members
-
-    @property
-    def size(self):
-        return self._size
-
-    @property
-    def members(self):
-        return self._members
-
-    def to_json(self):
-        return dict(_type=self.__class__.__name__, name=self.name, size=self.size, members=[m.to_json() for m in self.members])
-
-
-class Structure(NamedProperty):
-    class Field(TypedProperty):
-        def __init__(self,
-                     name: str,
-                     type_name: str,
-                     parent,
-                     offset: int,
-                     bit_offset: typing.Union[int, None] = None,
-                     bit_size: typing.Union[int, None] = None):
-            super().__init__(name, type_name, parent)
-            self._offset = offset
-            self._bit_offset = bit_offset
-            self._bit_size = bit_size
-
-        @property
-        def offset(self):
-            return self._offset
-
-        @property
-        def bit_offset(self):
-            return self._bit_offset
-
-        @property
-        def bit_size(self):
-            return self._bit_size
-
-        def to_json(self):
-            try:
-                return dict(_type=self.__class__.__name__,
-                            name=self.name,
-                            offset=self.offset,
-                            bit_offset=self.bit_offset,
-                            bit_size=self.bit_size,
-                            type=self.type.to_json())
-            except AttributeError as e:
-                return None
-
-    """
-    represents a structure.
-    """
-
-    def __init__(self, name: str, size: int, fields: typing.Tuple[Field]):
-        super().__init__(name)
-        self._size = size
-        self._fields = fields
-
-    @property
-    def size(self):
-        return self._size
-
-    @property
-    def fields(self):
-        return self._fields
-
-    def to_json(self):
-        return dict(_type=self.__class__.__name__,
-                    name=self.name,
-                    size=self.size,
-                    fields=[m.to_json() for m in self.fields])
-
-
-class Enumeration(NamedProperty):
-    class Enumerator(NamedProperty):
-        def __init__(self, name: str, value: int):
-            super().__init__(name)
-            self._value = value
-
-        @property
-        def value(self):
-            return self._value
-
-        def to_json(self):
-            return dict(_type=self.__class__.__name__, name=self.name, value=self.value)
-
-    def __init__(self, name: str, size: int, enumerators: typing.Tuple[Enumerator]):
-        super().__init__(name)
-        self._size = size
-        self._enumerators = enumerators
-
-    @property
-    def size(self):
-        return self._size
-
-    @property
-    def enumerators(self):
-        return self._enumerators
-
-    def to_json(self):
-        return dict(_type=self.__class__.__name__,
-                    name=self.name,
-                    size=self.size,
-                    enumerators=[e.to_json() for e in self.enumerators])
-
-
-class Array(TypedProperty):
-    def __init__(self, name: str, type_name: str, parent, dimension: typing.List[int]):
-        super().__init__(name, type_name, parent)
-        self._dimension = dimension
-
-    @property
-    def dimension(self):
-        return self._dimension
-
-    def to_json(self):
-        return dict(_type=self.__class__.__name__, name=self.name, type=self.type.to_json(), dimension=self.dimension)
-
-
-class Variable(TypedProperty):
-    """
-    represents a variable.
-    """
-
-    def __init__(self, name: str, type_name: str, parent, address: int):
-        super().__init__(name, type_name, parent)
-        self._address = address
-
-    @property
-    def address(self) -> int:
-        return self._address
-
-    def to_json(self):
-        return dict(_type=self.__class__.__name__, name=self.name, address=self.address, type=self.type.to_json())
-
-
-class Pointer(TypedProperty):
-    def __init__(self, name, type_name: str, parent):
-        super().__init__(name, type_name, parent)
-
-    def to_json(self):
-        return dict(_type=self.__class__.__name__, name=self.name, type=self.type.to_json())
-
-
-class Constant(TypedProperty):
-    def __init__(self, name: str, type_name: str, parent):
-        super().__init__(name, type_name, parent)
-
-    def to_json(self):
-        return dict(_type=self.__class__.__name__, name=self.name, type=self.type.to_json())
-
-
-class SubRoutine(object):
-    def __init__(self, name: str):
-        self._name = name
-
-    @property
-    def name(self):
-        return self._name
-
-    def to_json(self):
-        return dict(_type=self.__class__.__name__, name=self.name)
-
-
 class AbiInfo(object):
     """
     represents the header of the file.
@@ -300,56 +96,325 @@ class ElfFile(ELF):
 
     """
 
-    def __init__(self, path):
-        fp = open(path, 'rb')
-        super(ElfFile, self).__init__(stream=fp)
+    _COMPOSITE_TAGS = ('DW_TAG_enumeration_type',
+                       'DW_TAG_structure_type',
+                       'DW_TAG_union_type',
+                       'DW_TAG_array_type',
+                       'DW_TAG_subroutine_type')
+
+    _HANDLERS = dict(DW_TAG_typedef='_create_type_definition',
+                     DW_TAG_base_type='_create_base_type',
+                     DW_TAG_enumeration_type='_create_enumeration_type',
+                     DW_TAG_structure_type='_create_structure_type',
+                     DW_TAG_union_type='_create_union_type',
+                     DW_TAG_pointer_type='_create_pointer_type',
+                     DW_TAG_variable='_create_variable',
+                     DW_TAG_const_type='_create_const_type',
+                     DW_TAG_array_type='_create_array_type',
+                     DW_TAG_subroutine_type='_create_subroutine_type',
+                     DW_TAG_volatile_type='_unhandled_type',
+                     DW_TAG_subprogram='_unhandled_type',
+                     DW_TAG_inlined_subroutine='_unhandled_type',
+                     DW_TAG_formal_parameter='_unhandled_type',
+                     DW_TAG_lexical_block='_unhandled_type',
+                     DW_TAG_compile_unit='_unhandled_type')
+
+    # tags of the types, in order of precedence when several types have the same name.
+    _TYPE_TAGS = ('DW_TAG_typedef',
+                  'DW_TAG_base_type',
+                  'DW_TAG_enumeration_type',
+                  'DW_TAG_structure_type',
+                  'DW_TAG_union_type',
+                  'DW_TAG_pointer_type',
+                  'DW_TAG_array_type',
+                  'DW_TAG_subroutine_type',
+                  'DW_TAG_const_type')
+
+    _TYPE_PRECEDENCE = dict((tag, precedence) for precedence, tag in enumerate(_TYPE_TAGS))
+
+    LOAD_ALL = frozenset(('symbols', 'types', 'variables', 'lines'))
+
+    # minimum number of compilation units for which parsing them in parallel pays off the start of the processes.
+    _PARALLEL_MIN_UNITS = 64
+
+    def __init__(self,
+                 path,
+                 lazy: bool = False,
+                 workers: typing.Union[int, None] = None,
+                 cache_dir: typing.Union[str, None] = None,
+                 load: typing.Union[typing.Iterable[str], None] = None):
+        """
+        :param path: path of the ELF file
+        :param lazy: if True, only an index of the named DWARF entries is built while loading the file, and the type
+        and variable objects are created the first time they are requested
+        :param workers: if greater than 1, the compilation units are parsed by a pool of the specified number of
+        processes, provided that the file contains enough of them (ignored if lazy is True)
+        :param cache_dir: if not None, the result of the DWARF parsing is stored in this directory if it can be
+        written, and reused the next time the same file is loaded (ignored if lazy is True)
+        :param load: information to load from the file, among 'symbols', 'types', 'variables' and 'lines' (all of them
+        if None). loading the variables implies loading the symbols and the types
+        """
+        load = self.LOAD_ALL if load is None else frozenset(load)
+        if not load.issubset(self.LOAD_ALL):
+            raise ValueError('unknown information to load: ' + ', '.join(sorted(load - self.LOAD_ALL)))
+        if 'variables' in load:
+            load = load.union(('symbols', 'types'))
+        super(ElfFile, self).__init__(stream=MappedStream(path))
         self.path = self.stream.name
         self.endianness = self.little_endian
-        self._symbols = dict()
-        self._type_definitions = dict()
-        self._base_types = dict()
-        self._enumerations = dict()
-        self._structures = dict()
-        self._unions = dict()
-        self._pointers = dict()
-        self._arrays = dict()
+        self._lazy = lazy
+        self._load = load
+        self._symbols = SymbolTable(self.elfclass)
+        # types by offset of their DIE, and offset of the type to use for each type name, with its precedence.
+        self._types = dict()
+        self._type_names = dict()
+        # names of the types of each tag, and sorted indexes of the names, built the first time they are searched.
+        self._tag_type_names = dict()
+        self._name_indexes = dict()
         self._variables = dict()
-        self._sub_routines = dict()
-        self._constants = dict()
+        self._sorted_variables = None
+        # offsets of the DIEs of the variables which have not been turned into objects yet, by name.
+        self._pending_variables = dict()
+        # whether the DIE kept for each variable name is a declaration only (see _supersedes).
+        self._variable_declarations = dict()
+        # address indexes of the symbols and of the variables, built the first time they are needed.
+        self._symbol_index = None
+        self._variable_index = None
+        # table of the fields of all the variables, built the first time it is needed, and resolver of their paths.
+        self._field_table = None
+        self._path_resolver = PathResolver(self.get_variable,
+                                           lambda: itertools.chain(self._variables, self._pending_variables),
+                                           self._sizeof)
+        # tables of the source lines and of the functions, decoded the first time they are needed.
+        self._line_table = None
+        self._function_table = None
+        # images of the loadable segments, by fill byte, and maps of the virtual and physical address spaces.
+        self._images = dict()
+        self._memory_maps = dict()
+        # decoders and numpy dtypes of the types, by type, built the first time they are requested.
+        self._codecs = dict()
+        self._dtypes = dict()
+        if 'symbols' in self._load:
+            self._load_symbols()
+        if 'types' in self._load:
+            self._load_dwarf_info(workers, cache_dir)
+
+    def _load_symbols(self):
         for section in self.iter_sections():
-            if hasattr(section, 'iter_symbols'):
-                for sym in section.iter_symbols():
-                    self._symbols[sym.name] = sym.entry
-        for cu in self.get_dwarf_info().iter_CUs():
-            iter_dies = cu.iter_DIEs()
-            for die in iter_dies:
-                # if die.offset == 303421:
-                #     print(die)
-                if die.tag:
-                    self._factory(die.tag, die, iter_dies)
-
-    def _factory(self, tag: typing.Union[str, None], die: DIE, die_iterator: typing.Iterator[DIE]):
+            if isinstance(section, SymbolTableSection):
+                string_table = self.get_section(section['sh_link'])
+                self._symbols.load(self.stream.view(section['sh_offset'], section['sh_size']),
+                                   section['sh_entsize'],
+                                   string_table.data(),
+                                   self.little_endian)
+
+    def _load_dwarf_info(self, workers: typing.Union[int, None], cache_dir: typing.Union[str, None]):
+        if self._lazy:
+            for cu in self.get_dwarf_info().iter_CUs():
+                for die in self._iter_dies(cu):
+                    self._index(die)
+            return
+        cache = records = None
+        if cache_dir is not None:
+            cache = RecordCache(cache_dir)
+            key = cache.key(self.path)
+            records = cache.load(key)
+        if records is None:
+            if workers is not None and workers > 1:
+                records = self._parse_in_parallel(workers)
+            else:
+                records = list()
+                for cu in self.get_dwarf_info().iter_CUs():
+                    records.extend(self._parse_compilation_unit(cu))
+            if cache is not None:
+                cache.store(key, records)
+        for record in records:
+            self._register(record)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_args):
+        self.close()
+
+    def close(self):
+        """
+        releases the memory mapping of the ELF file. the objects already created from the file remain usable, but
+        the methods which need to read the file can not be used anymore.
+        """
+        self.stream.close()
+
+    def section_view(self, name: str) -> memoryview:
+        """
+        returns a read-only view on the content of a section, without copying it.
+
+        :param name: name of the section
+        """
+        section = self.get_section_by_name(name)
+        if section is None:
+            raise ElfException('section ' + str(name) + ' not found')
+        if section['sh_type'] == 'SHT_NOBITS':
+            return memoryview(bytes(section['sh_size']))
+        return self.stream.view(section['sh_offset'], section['sh_size'])
+
+    @staticmethod
+    def _iter_dies(cu) -> typing.Iterator[DIE]:
+        """
+        yields the DIEs of a compilation unit in the order of their appearance, without the null DIEs and without the
+        children of the DIEs which are handled by their parent (structure members, enumerators, ...).
+        """
+        stack = [cu.get_top_DIE()]
+        while stack:
+            die = stack.pop()
+            yield die
+            if die.tag not in ElfFile._COMPOSITE_TAGS:
+                stack.extend(reversed(tuple(die.iter_children())))
+
+    @classmethod
+    def _parse_compilation_unit(cls, cu) -> typing.List[tuple]:
+        """
+        returns the records created by the handlers for the DIEs of a compilation unit, in the order of the DIEs.
+        """
+        return [r for r in (cls._factory(die.tag, die) for die in cls._iter_dies(cu)) if r is not None]
+
+    def _parse_in_parallel(self, workers: int) -> typing.List[tuple]:
+        cus = list(self.get_dwarf_info().iter_CUs())
+        if len(cus) < self._PARALLEL_MIN_UNITS:
+            return list(itertools.chain.from_iterable(self._parse_compilation_unit(cu) for cu in cus))
+        # hand a single contiguous range of compilation units to each worker, the ranges having about the same size.
+        total = sum(cu.size for cu in cus)
+        chunks = list()
+        parsed = 0
+        for cu in cus:
+            if not chunks or parsed >= total * len(chunks) / workers:
+                chunks.append([cu.cu_offset, None])
+            chunks[-1][1] = cu.cu_offset + cu.size
+            parsed += cu.size
+        chunks = [tuple(chunk) for chunk in chunks]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(itertools.chain.from_iterable(executor.map(_parse_compilation_units,
+                                                                   itertools.repeat(self.path),
+                                                                   chunks)))
+
+    def _index(self, die: DIE):
+        if die.tag in self._TYPE_PRECEDENCE:
+            self._name_type(die.tag, self._get_element_name_from_die(die), die.offset,
+                            'DW_AT_declaration' in die.attributes.keys())
+        elif die.tag == 'DW_TAG_variable' and 'variables' in self._load:
+            name = self._get_element_name_from_die(die)
+            if name in self._symbols and self._supersedes(name, 'DW_AT_declaration' in die.attributes.keys()):
+                self._pending_variables[name] = die.offset
+
+    def _name_type(self, tag: str, name: str, offset: int, declaration: bool = False):
+        self._tag_type_names.setdefault(tag, set()).add(name)
+        # the declarations (of opaque types) come after all the definitions, so that a type declared in a compilation
+        # unit is resolved to its definition from another one, whatever the order of the compilation units.
+        precedence = self._TYPE_PRECEDENCE[tag] + (len(self._TYPE_TAGS) if declaration else 0)
+        if name not in self._type_names.keys() or self._type_names[name][0] >= precedence:
+            self._type_names[name] = (precedence, offset)
+
+    def _materialize_type(self, offset: int):
+        die = self.get_dwarf_info().get_DIE_from_refaddr(offset)
+        if die.tag not in self._TYPE_PRECEDENCE:
+            return None
+        self._types[offset] = self._build(self._factory(die.tag, die))
+        return self._types[offset]
+
+    def _materialize_variable(self, name: str) -> Variable:
+        die = self.get_dwarf_info().get_DIE_from_refaddr(self._pending_variables.pop(name))
+        self._variables[name] = self._build(self._factory(die.tag, die))
+        self._sorted_variables = None
+        return self._variables[name]
+
+    @classmethod
+    def _factory(cls, tag: typing.Union[str, None], die: DIE) -> typing.Union[tuple, None]:
         try:
-            fcn = dict(DW_TAG_typedef=self._create_type_definition,
-                       DW_TAG_base_type=self._create_base_type,
-                       DW_TAG_enumeration_type=self._create_enumeration_type,
-                       DW_TAG_structure_type=self._create_structure_type,
-                       DW_TAG_union_type=self._create_union_type,
-                       DW_TAG_pointer_type=self._create_pointer_type,
-                       DW_TAG_variable=self._create_variable,
-                       DW_TAG_const_type=self._create_const_type,
-                       DW_TAG_array_type=self._create_array_type,
-                       DW_TAG_subroutine_type=self._create_subroutine_type,
-                       DW_TAG_volatile_type=self._unhandled_type,
-                       DW_TAG_subprogram=self._unhandled_type,
-                       DW_TAG_formal_parameter=self._unhandled_type,
-                       DW_TAG_lexical_block=self._unhandled_type,
-                       DW_TAG_compile_unit=self._unhandled_type)[tag]
+            fcn = getattr(cls, cls._HANDLERS[tag])
         except KeyError as e:
             print(f'{e} | {die.get_parent()}')
             return None
         else:
-            return fcn(die, die_iterator)
+            return fcn(die)
+
+    def _register(self, record: tuple):
+        """
+        creates the object described by a record returned by one of the handlers, and stores it in its table.
+        """
+        tag, offset, name = record[0], record[1], record[2]
+        if tag == 'DW_TAG_variable':
+            if 'variables' in self._load and name in self._symbols and self._supersedes(name, record[5]):
+                self._variables[name] = self._build(record)
+                self._sorted_variables = None
+        else:
+            t = self._types[offset] = self._build(record)
+            self._name_type(tag, name, offset, isinstance(t, (Structure, Union)) and t.declaration)
+
+    def _supersedes(self, name: str, declaration: bool) -> bool:
+        """
+        returns True if a DIE of a variable takes precedence over the DIE already kept for a variable with the same
+        name, and keeps it: a definition takes precedence over a declaration (extern declarations may have an
+        incomplete type), otherwise the first DIE is kept.
+        """
+        kept = self._variable_declarations.get(name)
+        if kept is None or kept and not declaration:
+            self._variable_declarations[name] = declaration
+            return True
+        return False
+
+    @staticmethod
+    def _is_complete(t, complete: typing.Set[int]) -> bool:
+        """
+        returns True if none of the types reached from a type (through fields, members, pointers, ...) is a type name
+        left unresolved or a declared-only structure or union.
+
+        :param t: type to check
+        :param complete: identifiers of the types already found complete, extended with the types reached from t if it
+                         is complete
+        """
+        reached = set()
+        pending = [t]
+        while pending:
+            t = pending.pop()
+            if id(t) in complete or id(t) in reached:
+                continue
+            if isinstance(t, str) or isinstance(t, (Structure, Union)) and t.declaration:
+                return False
+            reached.add(id(t))
+            if isinstance(t, Structure):
+                pending.extend(f.type for f in t.fields)
+            elif isinstance(t, Union):
+                pending.extend(m.type for m in t.members)
+            elif isinstance(t, TypedProperty):
+                pending.append(t.type)
+        complete.update(reached)
+        return True
+
+    def _build(self, record: tuple):
+        """
+        returns the object described by a record returned by one of the handlers, or None for a variable without
+        symbol.
+        """
+        tag, name = record[0], record[2]
+        if tag == 'DW_TAG_variable':
+            if name in self._symbols:
+                return Variable(name, record[4], self, self._symbols.values[self._symbols.row(name)], record[3])
+            return None
+        elif tag == 'DW_TAG_base_type':
+            return BaseType(name, record[3], record[4])
+        elif tag == 'DW_TAG_enumeration_type':
+            return Enumeration(name, record[3], tuple(Enumeration.Enumerator(*e) for e in record[4]))
+        elif tag == 'DW_TAG_structure_type':
+            return Structure(name, record[3], tuple(Structure.Field(n, t, self, o, bo, bs, to)
+                                                    for n, to, t, o, bo, bs in record[4]), record[5])
+        elif tag == 'DW_TAG_union_type':
+            return Union(name, record[3], tuple(Union.Member(n, t, self, to) for n, to, t in record[4]), record[5])
+        elif tag == 'DW_TAG_array_type':
+            return Array(name, record[4], self, record[5], record[3])
+        elif tag == 'DW_TAG_subroutine_type':
+            return SubRoutine(name)
+        return dict(DW_TAG_typedef=TypedefType,
+                    DW_TAG_pointer_type=Pointer,
+                    DW_TAG_const_type=Constant)[tag](name, record[4], self, record[3])
 
     @staticmethod
     def _get_element_name_from_die(die: DIE) -> str:
@@ -360,7 +425,11 @@ class ElfFile(ELF):
         return name
 
     @staticmethod
-    def _get_element_type_name_from_die(die: DIE) -> str:
+    def _get_element_type_from_die(die: DIE) -> typing.Tuple[typing.Union[int, None], str]:
+        """
+        returns the offset of the DIE of the type of an element, and the name of this type. the offset is None if the
+        DIE is only a declaration of the type, which must then be looked up by name.
+        """
         # if 'DW_AT_name' in die.attributes.keys():
         #     type_name = die.attributes['DW_AT_name'].value.decode()
         # else:
@@ -374,101 +443,110 @@ class ElfFile(ELF):
                 type_name = t.attributes['DW_AT_name'].value.decode()
             else:
                 type_name = f'anonymous_{t.offset}'
-        return type_name
+        if 'DW_AT_declaration' in t.attributes.keys():
+            return None, type_name
+        return t.offset, type_name
 
     @staticmethod
-    def _unhandled_type(_die: DIE, _die_iterator: typing.Iterator[DIE]):
-        pass
-
-    def _create_subroutine_type(self, die: DIE, die_iterator: typing.Iterator[DIE]):
-        name = self._get_element_name_from_die(die)
-        next_die = next(die_iterator)
-        while next_die.tag is not None:
-            next_die = next(die_iterator)
-        self._sub_routines[name] = SubRoutine(name)
-
-    def _create_type_definition(self, die: DIE, _: typing.Iterator[DIE]):
-        name = self._get_element_name_from_die(die)
-        type_name = self._get_element_type_name_from_die(die)
-        self._type_definitions[name] = TypedefType(name, type_name, self)
-
-    def _create_base_type(self, die: DIE, _: typing.Iterator[DIE]):
-        name = self._get_element_name_from_die(die)
+    def _unhandled_type(_die: DIE):
+        return None
+
+    @classmethod
+    def _create_subroutine_type(cls, die: DIE):
+        name = cls._get_element_name_from_die(die)
+        return die.tag, die.offset, name
+
+    @classmethod
+    def _create_type_definition(cls, die: DIE):
+        name = cls._get_element_name_from_die(die)
+        type_offset, type_name = cls._get_element_type_from_die(die)
+        return die.tag, die.offset, name, type_offset, type_name
+
+    @classmethod
+    def _create_base_type(cls, die: DIE):
+        name = cls._get_element_name_from_die(die)
         size = die.attributes['DW_AT_byte_size'].value
-        self._base_types[name] = BaseType(name, size)
+        encoding = die.attributes['DW_AT_encoding'].value if 'DW_AT_encoding' in die.attributes.keys() else None
+        return die.tag, die.offset, name, size, encoding
 
-    def _create_enumeration_type(self, die: DIE, die_iterator: typing.Iterator[DIE]):
-        name = self._get_element_name_from_die(die)
+    @classmethod
+    def _create_enumeration_type(cls, die: DIE):
+        name = cls._get_element_name_from_die(die)
         size = die.attributes['DW_AT_byte_size'].value
         # type_name = die.get_DIE_from_attribute('DW_AT_type').attributes['DW_AT_name'].value.decode()
-        next_die = next(die_iterator)
         enumerators = list()
-        while next_die.tag == "DW_TAG_enumerator":
-            enumerators.append(Enumeration.Enumerator(next_die.attributes['DW_AT_name'].value.decode(),
-                                                      next_die.attributes['DW_AT_const_value'].value))
-            next_die = next(die_iterator)
-        self._enumerations[name] = Enumeration(name, size, tuple(enumerators))
-
-    def _create_structure_type(self, die: DIE, die_iterator: typing.Iterator[DIE]):
-        name = self._get_element_name_from_die(die)
+        for child in die.iter_children():
+            if child.tag == 'DW_TAG_enumerator':
+                enumerators.append((child.attributes['DW_AT_name'].value.decode(),
+                                    child.attributes['DW_AT_const_value'].value))
+        return die.tag, die.offset, name, size, tuple(enumerators)
+
+    @classmethod
+    def _create_structure_type(cls, die: DIE):
+        name = cls._get_element_name_from_die(die)
         if 'DW_AT_byte_size' in die.attributes.keys():
             size = die.attributes['DW_AT_byte_size'].value
         else:
             size = 0
         fields = list()
-        next_die = next(die_iterator)
-        while next_die.tag == 'DW_TAG_member':
-            field_name = self._get_element_name_from_die(next_die)
-            field_type_name = self._get_element_type_name_from_die(next_die)
-            field_offset = self.get_location_from_attribute(next_die.attributes['DW_AT_data_member_location'])
+        for child in die.iter_children():
+            if child.tag != 'DW_TAG_member':
+                continue
+            field_name = cls._get_element_name_from_die(child)
+            field_type_offset, field_type_name = cls._get_element_type_from_die(child)
+            field_offset = cls.get_location_from_attribute(child.attributes['DW_AT_data_member_location'])
             field_bit_offset = None
-            if 'DW_AT_bit_offset' in next_die.attributes.keys():
-                field_bit_offset = next_die.attributes['DW_AT_bit_offset'].value
+            if 'DW_AT_bit_offset' in child.attributes.keys():
+                field_bit_offset = child.attributes['DW_AT_bit_offset'].value
             field_bit_size = None
-            if 'DW_AT_bit_size' in next_die.attributes.keys():
-                field_bit_size = next_die.attributes['DW_AT_bit_size'].value
-            fields.append(Structure.Field(field_name, field_type_name, self, field_offset, field_bit_offset,
-                                          field_bit_size))
-            next_die = next(die_iterator)
-        self._structures[name] = Structure(name, size, tuple(fields))
-
-    def _create_union_type(self, die: DIE, die_iterator: typing.Iterator[DIE]):
-        name = self._get_element_name_from_die(die)
+            if 'DW_AT_bit_size' in child.attributes.keys():
+                field_bit_size = child.attributes['DW_AT_bit_size'].value
+            fields.append((field_name, field_type_offset, field_type_name, field_offset, field_bit_offset,
+                           field_bit_size))
+        return die.tag, die.offset, name, size, tuple(fields), 'DW_AT_declaration' in die.attributes.keys()
+
+    @classmethod
+    def _create_union_type(cls, die: DIE):
+        name = cls._get_element_name_from_die(die)
         members = list()
-        next_die = next(die_iterator)
-        while next_die.tag == 'DW_TAG_member':
-            member_name = self._get_element_name_from_die(next_die)
-            member_type_name = self._get_element_type_name_from_die(next_die)
-            members.append(Union.Member(member_name, member_type_name, self))
-            next_die = next(die_iterator)
-        self._unions[name] = Union(name, die.attributes['DW_AT_byte_size'].value, tuple(members))
-
-    def _create_pointer_type(self, die: DIE, _: typing.Iterator[DIE]):
-        name = self._get_element_name_from_die(die)
-        type_name = self._get_element_type_name_from_die(die)
-        self._pointers[name] = Pointer(name, type_name, self)
-
-    def _create_variable(self, die: DIE, _: typing.Iterator[DIE]):
-        name = self._get_element_name_from_die(die)
-        type_name = self._get_element_type_name_from_die(die)
-        if name in self._symbols.keys():
-            self._variables[name] = Variable(name, type_name, self, self._symbols[name].st_value)
-
-    def _create_const_type(self, die: DIE, _: typing.Iterator[DIE]):
-        name = self._get_element_name_from_die(die)
-        type_name = self._get_element_type_name_from_die(die)
-        self._constants[name] = Constant(name, type_name, self)
-
-    def _create_array_type(self, die: DIE, die_iterator: typing.Iterator[DIE]):
-        name = self._get_element_name_from_die(die)
-        type_name = self._get_element_type_name_from_die(die)
-        next_die = next(die_iterator)
+        for child in die.iter_children():
+            if child.tag == 'DW_TAG_member':
+                member_name = cls._get_element_name_from_die(child)
+                member_type_offset, member_type_name = cls._get_element_type_from_die(child)
+                members.append((member_name, member_type_offset, member_type_name))
+        if 'DW_AT_byte_size' in die.attributes.keys():
+            size = die.attributes['DW_AT_byte_size'].value
+        else:
+            size = 0
+        return die.tag, die.offset, name, size, tuple(members), 'DW_AT_declaration' in die.attributes.keys()
+
+    @classmethod
+    def _create_pointer_type(cls, die: DIE):
+        name = cls._get_element_name_from_die(die)
+        type_offset, type_name = cls._get_element_type_from_die(die)
+        return die.tag, die.offset, name, type_offset, type_name
+
+    @classmethod
+    def _create_variable(cls, die: DIE):
+        name = cls._get_element_name_from_die(die)
+        type_offset, type_name = cls._get_element_type_from_die(die)
+        return die.tag, die.offset, name, type_offset, type_name, 'DW_AT_declaration' in die.attributes.keys()
+
+    @classmethod
+    def _create_const_type(cls, die: DIE):
+        name = cls._get_element_name_from_die(die)
+        type_offset, type_name = cls._get_element_type_from_die(die)
+        return die.tag, die.offset, name, type_offset, type_name
+
+    @classmethod
+    def _create_array_type(cls, die: DIE):
+        name = cls._get_element_name_from_die(die)
+        type_offset, type_name = cls._get_element_type_from_die(die)
         dimension = list()
-        while next_die.tag == 'DW_TAG_subrange_type':
-            if 'DW_AT_upper_bound' in next_die.attributes.keys():
-                dimension.append(next_die.attributes['DW_AT_upper_bound'].value)
-            next_die = next(die_iterator)
-        self._arrays[name] = Array(name, type_name, self, dimension)
+        for child in die.iter_children():
+            if child.tag == 'DW_TAG_subrange_type' and 'DW_AT_upper_bound' in child.attributes.keys():
+                dimension.append(child.attributes['DW_AT_upper_bound'].value)
+        return die.tag, die.offset, name, type_offset, type_name, dimension
 
     @staticmethod
     def get_location_from_attribute(attribute) -> int:
@@ -480,24 +558,33 @@ class ElfFile(ELF):
             raise AttributeError(attribute.form)
 
     def get_type_from_type_name(self, type_name: str):
-        if type_name in self._type_definitions.keys():
-            return self._type_definitions[type_name]
-        elif type_name in self._base_types.keys():
-            return self._base_types[type_name]
-        elif type_name in self._enumerations.keys():
-            return self._enumerations[type_name]
-        elif type_name in self._structures.keys():
-            return self._structures[type_name]
-        elif type_name in self._unions.keys():
-            return self._unions[type_name]
-        elif type_name in self._pointers.keys():
-            return self._pointers[type_name]
-        elif type_name in self._arrays.keys():
-            return self._arrays[type_name]
-        elif type_name in self._sub_routines.keys():
-            return self._sub_routines[type_name]
-        elif type_name in self._constants.keys():
-            return self._constants[type_name]
+        """
+        returns the type with the specified name, or the name itself if no such type exists. if several types have
+        the same name, the type definitions have precedence over the base types, which have precedence over the
+        enumerations, structures, unions, pointers, arrays, subroutines and constants, in this order.
+
+        :param type_name: name of the type
+        """
+        if type_name in self._type_names.keys():
+            return self.get_type_from_offset(self._type_names[type_name][1], type_name)
+        return type_name
+
+    def get_type_from_offset(self, offset: typing.Union[int, None], type_name: typing.Union[str, None] = None):
+        """
+        returns the type defined by the DIE at the specified offset. if no type is defined at this offset, the type is
+        looked up by name instead.
+
+        :param offset: offset of the DIE in the .debug_info section
+        :param type_name: name of the type
+        """
+        if offset in self._types.keys():
+            return self._types[offset]
+        elif offset is not None and self._lazy:
+            t = self._materialize_type(offset)
+            if t is not None:
+                return t
+        if type_name in self._type_names.keys() and self._type_names[type_name][1] != offset:
+            return self.get_type_from_offset(self._type_names[type_name][1], type_name)
         return type_name
 
     @property
@@ -517,11 +604,12 @@ class ElfFile(ELF):
     @property
     def binary_address(self) -> Address:
         """
-        returns the lowest address of the binary from the ELF file.
+        returns the lowest address of the binary from the ELF file, the loadable segments without content in the file
+        (.bss, for instance) being ignored.
         """
         address = Address(-1)
         for segment in self.iter_segments():
-            if segment['p_type'] == 'PT_LOAD':
+            if segment['p_type'] == 'PT_LOAD' and segment['p_filesz'] > 0:
                 if (address == -1) or (segment.header['p_paddr'] < address):
                     address = segment.header['p_paddr']
         return address
@@ -529,15 +617,96 @@ class ElfFile(ELF):
     @property
     def binary(self) -> bytes:
         """
-        returns the binary from the ELF file.
+        returns the binary from the ELF file: the content of the loadable segments, placed at their physical address
+        relative to binary_address, the gaps between them being filled with zeros.
         :return: binary data
-        :rtype: bytearray
+        :rtype: bytes
         """
-        data = b''
-        for segment in self.iter_segments():
-            if segment['p_type'] == 'PT_LOAD':
-                data += segment.data()
-        return data
+        return self.image().tobytes()
+
+    def image(self, fill: int = 0x00) -> Image:
+        """
+        returns the image of the loadable segments of the ELF file, placed at their physical address relative to
+        binary_address. the content of the segments is not copied from the file (see Image), and the images are kept
+        for the next calls.
+
+        :param fill: value of the bytes between the segments
+        """
+        if fill not in self._images:
+            segments = [(s['p_paddr'], self.stream.view(s['p_offset'], s['p_filesz']))
+                        for s in self.iter_segments() if s['p_type'] == 'PT_LOAD' and s['p_filesz'] > 0]
+            self._images[fill] = Image(segments, fill, self.binary_address if segments else None)
+        return self._images[fill]
+
+    def read_memory(self, address: int, size: int, physical: bool = False) -> memoryview:
+        """
+        returns a read-only view on the initial content of the memory of the program, in the range [address, address +
+        size). the content is read from the loadable segments (or from the allocated sections for the files without
+        segments), the parts of the segments not stored in the file (.bss, for instance) reading as zeros. the view is
+        taken on the file without copy whenever possible.
+
+        :param address: address of the first byte
+        :param size: number of bytes
+        :param physical: if True, the address is a physical address (p_paddr) instead of a virtual address (p_vaddr)
+        :raise ElfException: if a part of the range is not mapped
+        """
+        if physical not in self._memory_maps:
+            regions = [(s['p_paddr' if physical else 'p_vaddr'], s['p_memsz'], s['p_offset'], s['p_filesz'])
+                       for s in self.iter_segments() if s['p_type'] == 'PT_LOAD']
+            if not regions:
+                regions = [(s['sh_addr'], s['sh_size'], s['sh_offset'], 0 if s['sh_type'] == 'SHT_NOBITS' else
+                            s['sh_size']) for s in self.iter_sections() if s['sh_flags'] & SH_FLAGS.SHF_ALLOC]
+            self._memory_maps[physical] = MemoryMap(self.stream, regions)
+        try:
+            return self._memory_maps[physical].read(address, size)
+        except ValueError as e:
+            raise ElfException(str(e))
+
+    def _resolve_type(self, t):
+        """
+        returns a type, or the type of the variable with the specified name, or the type with the specified name.
+        """
+        if isinstance(t, str):
+            if t in self._variables or t in self._pending_variables:
+                return self.get_variable(t).type
+            elif isinstance(self.get_type_from_type_name(t), str):
+                raise ElfException('no variable nor type named {}'.format(t))
+            return self.get_type_from_type_name(t)
+        return t
+
+    def decoder(self, t) -> Codec:
+        """
+        returns the decoder of the values of a type from raw bytes, for the endianness of the binary (see Codec). the
+        decoder is compiled the first time it is requested, and then kept.
+
+        :param t: type, or name of a variable (the decoder of its type is returned) or of a type
+        :raise ElfException: if no variable nor type has this name, or if the type can not be decoded
+        """
+        t = self._resolve_type(t)
+        if t not in self._codecs:
+            try:
+                self._codecs[t] = Codec(t, self.endianness, self._sizeof, self.elfclass // 8)
+            except ValueError as e:
+                raise ElfException(str(e))
+        return self._codecs[t]
+
+    def dtype(self, t):
+        """
+        returns the numpy structured dtype equivalent to a type, for the endianness of the binary (see to_dtype). an
+        array of values can then be decoded at once with numpy.frombuffer, and its bit fields with extract_bit_field.
+        the dtypes are kept for the next calls.
+
+        :param t: type, or name of a variable (the dtype of its type is returned) or of a type
+        :raise ElfException: if no variable nor type has this name, or if the type has no dtype equivalent
+        :raise ImportError: if numpy is not installed
+        """
+        t = self._resolve_type(t)
+        if t not in self._dtypes:
+            try:
+                self._dtypes[t] = to_dtype(t, self.endianness, self._sizeof, self.elfclass // 8)
+            except ValueError as e:
+                raise ElfException(str(e))
+        return self._dtypes[t]
 
     @property
     def endianness(self) -> str:
@@ -563,15 +732,59 @@ class ElfFile(ELF):
 
         :return: list of file name
         """
-        return (k for k, v in self._symbols.items() if hasattr(v, 'st_info') and v.st_info.type == 'STT_FILE')
+        return (k for k in self._symbols.unique_names() if self._symbols.type(self._symbols.row(k)) == STT_FILE)
 
     def variables(self) -> typing.Iterator[Variable]:
         """
-        returns an iterator on all variables available in the ELF file.
+        returns an iterator on all variables available in the ELF file, sorted by name. a variable which is declared
+        in some compilation units and defined in another one is described by its definition.
+        """
+        for name in tuple(self._pending_variables.keys()):
+            self._materialize_variable(name)
+        if self._sorted_variables is None:
+            self._sorted_variables = sorted(self._variables.values(), key=lambda v: v.name)
+        return iter(self._sorted_variables)
+
+    @classmethod
+    def iter_variables_streaming(cls, path) -> typing.Iterator[Variable]:
+        """
+        returns an iterator on all variables available in the ELF file, which yields the variables of each compilation
+        unit as soon as it has been parsed. the variables are yielded once each, and are not kept in memory by the
+        iterator. a variable whose type reaches a type that is only declared so far (an opaque structure defined in
+        another compilation unit) is held until all its types are complete or the last compilation unit is parsed, and
+        the variables which are only declared (see variables) are yielded at the end, so that the variables are
+        described as by variables.
+
+        :param path: path of the ELF file
         """
-        return (e for e in sorted(self._variables.values(), key=lambda v: v.name))
+        with cls(path, load=('symbols',)) as elf:
+            # variables only declared so far, which are yielded at the end unless their definition is found.
+            declarations = dict()
+            # defined variables whose types are not complete yet.
+            held = list()
+            complete = set()
+            for cu in elf.get_dwarf_info().iter_CUs():
+                for record in elf._parse_compilation_unit(cu):
+                    if record[0] != 'DW_TAG_variable':
+                        elf._register(record)
+                    elif record[2] in elf._symbols and elf._supersedes(record[2], record[5]):
+                        if record[5]:
+                            declarations[record[2]] = elf._build(record)
+                        else:
+                            declarations.pop(record[2], None)
+                            held.append(elf._build(record))
+                variables, held = held, list()
+                for variable in variables:
+                    if elf._is_complete(variable.type, complete):
+                        yield variable
+                    else:
+                        held.append(variable)
+            yield from held
+            yield from declarations.values()
 
     def get_variable(self, name: str) -> typing.Any:
+        if name in self._pending_variables.keys():
+            return self._materialize_variable(name)
         return self._variables[name]
 
     @property
@@ -589,8 +802,7 @@ class ElfFile(ELF):
         """
         returns an iterator on all symbols available in the ELF file.
         """
-        return (k for k, v in self._symbols.items() if
-                hasattr(v, 'st_info') and v.st_info.type == 'STT_OBJECT')
+        return (k for k in self._symbols.unique_names() if self._symbols.type(self._symbols.row(k)) == STT_OBJECT)
 
     def get_symbol(self, name: str) -> Symbol:
         """
@@ -598,10 +810,244 @@ class ElfFile(ELF):
 
         :param name: symbol name
         """
-        if name in self._symbols.keys():
-            return Symbol(self._symbols[name], name)
+        if name in self._symbols:
+            return Symbol(self._symbols.entry(self._symbols.row(name)), name)
         raise ElfException('symbol ' + str(name) + ' not found')
 
+    def get_symbols(self, name: str) -> typing.List[Symbol]:
+        """
+        returns a list of Symbol objects containing the properties of all the symbols named 'name' in the ELF file
+        (local symbols of different compilation units may have the same name), in the order of the symbol tables.
+
+        :param name: symbol name
+        """
+        symbols = [Symbol(self._symbols.entry(row), name) for row in self._symbols.rows(name)]
+        if not symbols:
+            raise ElfException('symbol ' + str(name) + ' not found')
+        return symbols
+
+    def _find(self, key: str, names: typing.Callable[[], typing.Iterable[str]], pattern: str, mode: str):
+        if key not in self._name_indexes:
+            self._name_indexes[key] = NameIndex(names())
+        try:
+            return self._name_indexes[key].find(pattern, mode)
+        except ValueError as e:
+            raise ElfException(str(e))
+
+    def find_symbols(self, pattern: str, mode: str = 'glob') -> typing.List[str]:
+        """
+        returns the sorted names of the symbols matching a pattern. the names are indexed the first time they are
+        searched, so that the queries starting with a literal prefix (or, for the glob patterns, ending with a literal
+        suffix) do not scan all the names (see NameIndex).
+
+        :param pattern: prefix, glob pattern (for instance 'Can_*') or regular expression, depending on mode
+        :param mode: 'prefix', 'glob' or 'regex'
+        :raise ElfException: if the mode or the regular expression is invalid
+        """
+        return self._find('symbols', self._symbols.unique_names, pattern, mode)
+
+    def find_variables(self, pattern: str, mode: str = 'glob') -> typing.List[str]:
+        """
+        returns the sorted names of the variables matching a pattern (see find_symbols).
+
+        :param pattern: prefix, glob pattern or regular expression, depending on mode
+        :param mode: 'prefix', 'glob' or 'regex'
+        :raise ElfException: if the mode or the regular expression is invalid
+        """
+        return self._find('variables', lambda: itertools.chain(self._variables, self._pending_variables), pattern,
+                          mode)
+
+    def find_types(self, pattern: str, mode: str = 'glob', tag: typing.Union[str, None] = None) -> typing.List[str]:
+        """
+        returns the sorted names of the types matching a pattern (see find_symbols), which can be passed to
+        get_type_from_type_name.
+
+        :param pattern: prefix, glob pattern or regular expression, depending on mode
+        :param mode: 'prefix', 'glob' or 'regex'
+        :param tag: if not None, only the types defined by DIEs with this tag (for instance 'DW_TAG_structure_type')
+        are searched
+        :raise ElfException: if the mode or the regular expression is invalid
+        """
+        if tag is None:
+            return self._find('types', self._type_names.keys, pattern, mode)
+        return self._find(tag, lambda: self._tag_type_names.get(tag, ()), pattern, mode)
+
+    @property
+    def symbol_table(self) -> SymbolTable:
+        """
+        returns the table of all the symbols of the ELF file, stored column by column.
+        """
+        return self._symbols
+
+    def _get_symbol_index(self) -> IntervalIndex:
+        if self._symbol_index is None:
+            table = self._symbols
+            self._symbol_index = IntervalIndex((table.values[row], table.values[row] + table.sizes[row], row)
+                                               for row in range(len(table)) if table.section_indexes[row] != 0)
+        return self._symbol_index
+
+    def symbol_at(self, address: int) -> typing.Union[Symbol, None]:
+        """
+        returns the symbol containing the specified address, or None if no symbol contains it. if several symbols
+        contain the address, the smallest one is returned.
+
+        :param address: requested address
+        """
+        rows = self._get_symbol_index().at(address)
+        if not rows:
+            return None
+        row = min(rows, key=lambda r: self._symbols.sizes[r])
+        return Symbol(self._symbols.entry(row), self._symbols.names[row])
+
+    def symbols_in_range(self, start: int, end: int) -> typing.List[Symbol]:
+        """
+        returns the symbols overlapping the address range [start, end), sorted by address.
+
+        :param start: first address of the range
+        :param end: address following the last address of the range
+        """
+        return [Symbol(self._symbols.entry(row), self._symbols.names[row])
+                for row in self._get_symbol_index().overlapping(start, end)]
+
+    def _sizeof(self, t) -> int:
+        """
+        returns the size of a type in [byte], or 0 if it is not known.
+        """
+        count = 1
+        while True:
+            if isinstance(t, (TypedefType, Constant)):
+                t = t.type
+            elif isinstance(t, Array):
+                if not t.dimension:
+                    return 0
+                for dimension in t.dimension:
+                    count *= dimension + 1
+                t = t.type
+            elif isinstance(t, Pointer):
+                return count * self.elfclass // 8
+            elif isinstance(t, (BaseType, Enumeration, Structure, Union)):
+                return count * t.size
+            else:
+                return 0
+
+    def _get_variable_index(self) -> IntervalIndex:
+        if self._variable_index is None:
+            intervals = list()
+            for variable in self.variables():
+                size = self._sizeof(variable.type)
+                if variable.name in self._symbols:
+                    size = max(size, self._symbols.sizes[self._symbols.row(variable.name)])
+                intervals.append((variable.address, variable.address + size, (variable, size)))
+            self._variable_index = IntervalIndex(intervals)
+        return self._variable_index
+
+    def _iter_fields(self, variable: Variable, size: int, start: int, end: int) -> typing.Iterator[tuple]:
+        """
+        returns an iterator on the fields of a variable which can not be split further (base types, enumerations,
+        pointers and elements of arrays of them), and which overlap the address range [start, end).
+        """
+        stack = [(variable.name, variable.address, variable.type, size)]
+        while stack:
+            path, address, t, size = stack.pop()
+            while isinstance(t, (TypedefType, Constant)):
+                t = t.type
+            if not (address < end and address + size > start):
+                continue
+            if isinstance(t, Structure) and t.fields:
+                stack.extend((path + '.' + f.name, address + f.offset, f.type, self._sizeof(f.type))
+                             for f in reversed(t.fields))
+            elif isinstance(t, Union) and t.members:
+                stack.extend((path + '.' + m.name, address, m.type, self._sizeof(m.type))
+                             for m in reversed(t.members))
+            elif isinstance(t, Array) and t.dimension and self._sizeof(t.type):
+                element_size = self._sizeof(t.type)
+                count = size // element_size
+                first = max(0, (start - address) // element_size)
+                last = min(count, (end - address + element_size - 1) // element_size)
+                for index in range(last - 1, first - 1, -1):
+                    indexes, remainder = list(), index
+                    for dimension in reversed(t.dimension):
+                        remainder, i = divmod(remainder, dimension + 1)
+                        indexes.append('[{}]'.format(i))
+                    stack.append((path + ''.join(reversed(indexes)), address + index * element_size, t.type,
+                                  element_size))
+            else:
+                yield path, address, size, t
+
+    def fields_in_range(self, start: int, end: int) -> typing.List[tuple]:
+        """
+        returns the fields of the variables overlapping the address range [start, end), sorted by variable address.
+        structures, unions and arrays are split into their members, so that each field is a tuple containing the path
+        of a base type, enumeration or pointer (for instance 'var.member[2].value'), its address, its size and its
+        type. the members of a union are all returned, as well as the bit fields sharing the same bytes.
+
+        :param start: first address of the range
+        :param end: address following the last address of the range
+        """
+        fields = list()
+        for variable, size in self._get_variable_index().overlapping(start, end):
+            fields.extend(self._iter_fields(variable, size, start, end))
+        return fields
+
+    def field_at(self, address: int) -> typing.Union[tuple, None]:
+        """
+        returns the field of a variable containing the specified address (see fields_in_range), or None if no
+        variable contains it. if several fields contain the address (members of a union, bit fields), the first one
+        in declaration order is returned.
+
+        :param address: requested address
+        """
+        return next(iter(self.fields_in_range(address, address + 1)), None)
+
+    @property
+    def field_table(self) -> FieldTable:
+        """
+        returns the table of the fields of all the variables, sorted by variable name, which can not be split further
+        (see FieldTable). the table is built the first time it is requested, and then kept.
+        """
+        if self._field_table is None:
+            self._field_table = FieldTable.from_variables(self.variables(), self._sizeof)
+        return self._field_table
+
+    def resolve(self, path: str) -> typing.Tuple[int, int, typing.Any]:
+        """
+        returns a tuple containing the address, the size and the type of a variable or of one of its fields, from its
+        path (for instance 'dummy_struct.inner[2].flag'). a bit field resolves to its storage unit, and the arrays
+        with several dimensions must be indexed in all their dimensions.
+
+        :param path: path of the field
+        :raise ElfException: if the path is invalid, or does not designate a field
+        """
+        try:
+            return self._path_resolver.resolve(path)
+        except ValueError as e:
+            raise ElfException(str(e))
+
+    def expand(self, pattern: str) -> typing.List[typing.Tuple[str, int, int, typing.Any]]:
+        """
+        returns the fields whose path matches a pattern, as tuples containing their path, address, size and type. a
+        name of the pattern may contain the wildcards '*' and '?', and an index may be '*' to select all the elements
+        of an array (for instance '*.counter' or 'buf[*]').
+
+        :param pattern: pattern of the paths
+        :raise ElfException: if the pattern is invalid
+        """
+        try:
+            return self._path_resolver.expand(pattern)
+        except ValueError as e:
+            raise ElfException(str(e))
+
+    def diff(self, other: 'ElfFile') -> typing.List[typing.Tuple[str, str, typing.Any, typing.Any]]:
+        """
+        returns the differences between the variables of this ELF file (the old build) and the variables of another
+        ELF file (the new build): the variables added, removed or moved, and the fields whose size or layout has
+        changed. the types are compared by digest of their layout, so that the unchanged types are not walked (see
+        pyelf.diff.diff for the form of the differences).
+
+        :param other: ELF file of the new build
+        """
+        return diff(self.variables(), other.variables(), self._sizeof, other._sizeof)
+
     def get_source_info(self, address):
         """
         returns the full path to the source file containing the code for the specified address, as well as the line
@@ -613,47 +1059,62 @@ class ElfFile(ELF):
         not in a function)
         :rtype: tuple
         """
-        file_path, line, func_name = None, -1, None
-        line = -1
-        func_name = None
-        dwarf_info = self.get_dwarf_info()
-        for CU in dwarf_info.iter_CUs():
-            try:
-                line_program = dwarf_info.line_program_for_CU(CU)
-            except DWARFError:
-                continue
-            if line_program is None:
-                continue
-            prev_state = None
-            if line == -1:
-                for entry in line_program.get_entries():
-                    if entry.state is None:
-                        continue
-                    if prev_state and prev_state.address <= address < entry.state.address:
-                        file_path = CU.get_top_DIE().get_full_path()
-                        line = prev_state.line
-                    if entry.state.end_sequence:
-                        prev_state = None
-                    else:
-                        prev_state = entry.state
-            if func_name is None:
-                for DIE in CU.iter_DIEs():
-                    try:
-                        if DIE.tag == 'DW_TAG_subprogram':
-                            low_pc = DIE.attributes['DW_AT_low_pc'].value
-                            high_pc_attr = DIE.attributes['DW_AT_high_pc']
-                            high_pc_attr_class = describe_form_class(high_pc_attr.form)
-                            if high_pc_attr_class == 'address':
-                                high_pc = high_pc_attr.value
-                            elif high_pc_attr_class == 'constant':
-                                high_pc = low_pc + high_pc_attr.value
-                            else:
-                                continue
-                            if low_pc <= address < high_pc:
-                                func_name = DIE.attributes['DW_AT_name'].value.decode()
-                                break
-                    except KeyError:
-                        continue
-                if func_name is not None:
-                    break
+        file_path, line = self._get_line_table().lookup(address) or (None, -1)
+        functions = self.get_inline_chain(address)
+        func_name = functions[0] if functions else None
         return file_path, line - 1 if line != -1 else -1, func_name
+
+    def get_inline_chain(self, address) -> typing.List[str]:
+        """
+        returns the names of the functions containing the code at the specified address: the function itself,
+        followed by the functions inlined in it (and inlined in each other), down to the innermost one.
+
+        :param address: requested address
+        :type address: int
+        :return: list of function names, empty if the address is not in a function
+        """
+        return self._get_function_table().lookup(address)
+
+    def symbolize(self, addresses: typing.Iterable[int]) -> SourceInfoTable:
+        """
+        returns the source information of several addresses at once, stored column by column (see SourceInfoTable).
+        the distinct addresses are sorted and looked up together, which is much faster than calling get_source_info
+        for each of them.
+
+        :param addresses: requested addresses, in any iterable or object supporting the buffer protocol (a numpy
+        array, for instance)
+        """
+        return SourceInfoTable(self._get_line_table(), self._get_function_table(), addresses)
+
+    def _get_line_table(self) -> LineTable:
+        if 'lines' not in self._load:
+            raise ElfException('line information not loaded')
+        if self._line_table is None:
+            self._line_table = LineTable.from_dwarf_info(self.get_dwarf_info())
+        return self._line_table
+
+    def _get_function_table(self) -> FunctionTable:
+        if 'lines' not in self._load:
+            raise ElfException('line information not loaded')
+        if self._function_table is None:
+            self._function_table = FunctionTable.from_dwarf_info(self.get_dwarf_info())
+        return self._function_table
+
+
+def _parse_compilation_units(path: str, cu_range: typing.Tuple[int, int]) -> typing.List[tuple]:
+    """
+    returns the records of the compilation units of an ELF file whose offset lies in the range [start, end). the
+    compilation units are parsed from the start offset, which must be the offset of a compilation unit.
+
+    :param path: path of the ELF file
+    :param cu_range: tuple containing the start and end offsets of the range of compilation units
+    """
+    with MappedStream(path) as stream:
+        dwarf_info = ELF(stream).get_dwarf_info()
+        records = list()
+        offset = cu_range[0]
+        while offset < cu_range[1]:
+            cu = dwarf_info.get_CU_at(offset)
+            records.extend(ElfFile._parse_compilation_unit(cu))
+            offset = cu.cu_offset + cu.size
+        return records
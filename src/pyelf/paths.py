@@ -0,0 +1,197 @@
+"""
+:file: paths.py
+:author: Guillaume Sottas
+:date: 18/10/2026
+"""
+import fnmatch
+import re
+import typing
+
+from pyelf.model import Array, Structure, Union, unalias
+
+_TOKEN = re.compile(r'(?:^|\.)([^.\[\]]+)|\[(\d+|\*)\]')
+
+
+def _parse(path: str) -> typing.List[typing.Tuple[str, typing.Union[str, int]]]:
+    """
+    returns the tokens of a path, as tuples containing the kind of the token ('name' or 'index') and its value (a name
+    or a pattern of names, an index or '*').
+    """
+    tokens = list()
+    position = 0
+    for match in _TOKEN.finditer(path):
+        if match.start() != position:
+            break
+        if match.group(1) is not None:
+            tokens.append(('name', match.group(1)))
+        else:
+            tokens.append(('index', '*' if match.group(2) == '*' else int(match.group(2))))
+        position = match.end()
+    if position != len(path) or not tokens or tokens[0][0] != 'name':
+        raise ValueError('invalid path {}'.format(path))
+    return tokens
+
+
+def _is_pattern(name: str) -> bool:
+    return '*' in name or '?' in name
+
+
+class PathResolver(object):
+    """
+    resolver of the paths of the fields of the variables (for instance 'var.member[2].value') into their address,
+    size and type.
+
+    the paths are resolved through an index of the members of each structure and union, by name, built the first
+    time the type is traversed. since all the variables of a type share the index of this type, the types form a trie
+    of all the paths, in which a path is resolved with one dictionary lookup per member and one multiplication per
+    array index, without enumerating the paths of the variables.
+    """
+
+    def __init__(self,
+                 get_variable: typing.Callable[[str], typing.Any],
+                 variable_names: typing.Callable[[], typing.Iterable[str]],
+                 sizeof: typing.Callable[[typing.Any], int]):
+        """
+        :param get_variable: function returning the variable with the specified name, raising KeyError if none
+        :param variable_names: function returning the names of all the variables
+        :param sizeof: function returning the size of a type, in [byte]
+        """
+        self._get_variable = get_variable
+        self._variable_names = variable_names
+        self._sizeof = sizeof
+        self._members = dict()
+        self._dimensions = dict()
+        self._sizes = dict()
+
+    def _get_members(self, t) -> typing.Dict[str, typing.Tuple[int, typing.Any]]:
+        """
+        returns the offset and the type of the members of a structure or union, by name (an empty dictionary for the
+        other types).
+        """
+        if t not in self._members:
+            if isinstance(t, Structure):
+                self._members[t] = dict((f.name, (f.offset, f.type)) for f in t.fields)
+            elif isinstance(t, Union):
+                self._members[t] = dict((m.name, (0, m.type)) for m in t.members)
+            else:
+                self._members[t] = dict()
+        return self._members[t]
+
+    def _get_dimensions(self, t) -> typing.Tuple[typing.Tuple[typing.Union[int, None], int], ...]:
+        """
+        returns the number of elements and the size of the elements of each dimension of an array, the number of
+        elements being None for the arrays of unknown size.
+        """
+        if t not in self._dimensions:
+            dimensions = list()
+            stride = self._sizeof(t.type)
+            for count in reversed([d + 1 for d in t.dimension] or [None]):
+                dimensions.insert(0, (count, stride))
+                stride *= count or 0
+            self._dimensions[t] = tuple(dimensions)
+        return self._dimensions[t]
+
+    def _get_size(self, t) -> int:
+        if t not in self._sizes:
+            self._sizes[t] = self._sizeof(t)
+        return self._sizes[t]
+
+    def resolve(self, path: str) -> typing.Tuple[int, int, typing.Any]:
+        """
+        returns a tuple containing the address, the size and the type of a variable or of one of its fields (the
+        storage unit of the bit fields). the arrays with several dimensions must be indexed in all their dimensions.
+
+        :param path: path of the field, without wildcard
+        :raise ValueError: if the path is invalid, or does not designate a field
+        """
+        tokens = _parse(path)
+        if any(value == '*' or kind == 'name' and _is_pattern(value) for kind, value in tokens):
+            raise ValueError('unexpected wildcard in path {}'.format(path))
+        path, address, size, t = self._walk(tokens, True)[0]
+        return address, size, t
+
+    def expand(self, pattern: str) -> typing.List[typing.Tuple[str, int, int, typing.Any]]:
+        """
+        returns the fields matching a pattern, as tuples containing their path, address, size and type. in the
+        pattern, a name may contain the wildcards '*' and '?' (see fnmatch), and an index may be '*' to select all the
+        elements of an array. the variables and members which do not match the rest of the pattern are ignored.
+
+        :param pattern: pattern of the paths (for instance '*.counter' or 'buf[*]')
+        :raise ValueError: if the pattern is invalid
+        """
+        return self._walk(_parse(pattern), False)
+
+    def _walk(self, tokens: typing.List[tuple], strict: bool) -> typing.List[tuple]:
+        """
+        returns the fields designated by tokens, as tuples containing their path, address, size and type. if strict
+        is True, a token which does not designate anything raises ValueError, otherwise the fields are skipped.
+        """
+        name = tokens[0][1]
+        names = sorted(fnmatch.filter(self._variable_names(), name)) if _is_pattern(name) else [name]
+        # each state holds the path, the address and the type of a field, and the number of elements and the size of
+        # the elements of the dimensions of an array which remain to be indexed.
+        states = list()
+        for name in names:
+            try:
+                variable = self._get_variable(name)
+            except KeyError:
+                if strict:
+                    raise ValueError('no variable named {}'.format(name))
+                continue
+            if variable.address is None:
+                if strict:
+                    raise ValueError('variable {} has no address'.format(name))
+                continue
+            states.append((name, variable.address, variable.type, ()))
+        for kind, value in tokens[1:]:
+            following = list()
+            for path, address, t, dimensions in states:
+                if kind == 'name':
+                    following.extend(self._select_members(path, address, t, dimensions, value, strict))
+                else:
+                    following.extend(self._select_elements(path, address, t, dimensions, value, strict))
+            states = following
+        fields = list()
+        for path, address, t, dimensions in states:
+            if dimensions:
+                if strict:
+                    raise ValueError('missing index in path {}'.format(path))
+                continue
+            fields.append((path, address, self._get_size(t), t))
+        return fields
+
+    def _select_members(self, path: str, address: int, t, dimensions: tuple, name: str, strict: bool):
+        members = self._get_members(unalias(t)) if not dimensions else dict()
+        if _is_pattern(name):
+            names = [n for n in members if fnmatch.fnmatchcase(n, name)]
+        elif name in members:
+            names = [name]
+        elif strict:
+            raise ValueError('{} has no member {}'.format(path, name))
+        else:
+            names = list()
+        for name in names:
+            offset, member_type = members[name]
+            yield '{}.{}'.format(path, name), address + offset, member_type, ()
+
+    def _select_elements(self, path: str, address: int, t, dimensions: tuple, index: typing.Union[int, str],
+                         strict: bool):
+        if not dimensions:
+            t = unalias(t)
+            if not isinstance(t, Array):
+                if strict:
+                    raise ValueError('{} is not an array'.format(path))
+                return
+            dimensions = self._get_dimensions(t)
+        (count, stride), remaining = dimensions[0], dimensions[1:]
+        if index == '*':
+            indexes = range(count or 0)
+        elif count is None or index < count:
+            indexes = (index,)
+        elif strict:
+            raise ValueError('index {} out of the bounds of {}'.format(index, path))
+        else:
+            indexes = ()
+        element_type = t.type if not remaining else t
+        for i in indexes:
+            yield '{}[{}]'.format(path, i), address + i * stride, element_type, remaining
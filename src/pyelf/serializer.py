@@ -0,0 +1,44 @@
+"""
+:file: serializer.py
+:author: Guillaume Sottas
+:date: 18/10/2026
+"""
+import json
+import typing
+
+
+def dump(variables: typing.Iterable, fp: typing.TextIO):
+    """
+    writes a JSON document describing variables to a file object, in which each type is written only once.
+
+    the document is an object with two members: 'variables', the list of the variables, and 'types', an object
+    mapping an identifier to the description of each type. wherever a type is used, it is replaced by a reference
+    object of the form {"$ref": "#/types/<identifier>"} (or null if the type is unknown). the variables and the types
+    are written one by one as the type graph is walked, so the document is never built in memory.
+
+    :param variables: variables to describe (see ElfFile.variables)
+    :param fp: file object opened in text mode
+    """
+    identifiers = dict()
+    pending = list()
+
+    def ref(t) -> typing.Union[typing.Dict[str, str], None]:
+        if not hasattr(t, 'to_json_ref'):
+            return None
+        if id(t) not in identifiers:
+            identifiers[id(t)] = (str(len(identifiers)), t)
+            pending.append(t)
+        return {'$ref': '#/types/' + identifiers[id(t)][0]}
+
+    fp.write('{"variables": [')
+    for index, variable in enumerate(variables):
+        fp.write(',\n' if index else '\n')
+        fp.write(json.dumps(variable.to_json_ref(ref), sort_keys=True))
+    fp.write('\n], "types": {')
+    separator = '\n'
+    while pending:
+        t = pending.pop()
+        fp.write(separator)
+        fp.write(json.dumps(identifiers[id(t)][0]) + ': ' + json.dumps(t.to_json_ref(ref), sort_keys=True))
+        separator = ',\n'
+    fp.write('\n}}\n')
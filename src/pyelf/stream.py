@@ -0,0 +1,96 @@
+"""
+:file: stream.py
+:author: Guillaume Sottas
+:date: 18/10/2026
+"""
+import mmap
+import os
+
+
+class MappedStream(object):
+    """
+    read-only, seekable stream over a memory-mapped file.
+
+    the file descriptor used to create the mapping is closed right away, the mapping itself is released by the close
+    method. besides the usual stream methods, the view method gives access to parts of the file without copying them.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as fp:
+            self._map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        self._position = 0
+        self.name = path
+
+    @property
+    def closed(self) -> bool:
+        return self._map is None
+
+    def __len__(self) -> int:
+        self._check_open()
+        return len(self._map)
+
+    def _check_open(self):
+        if self._map is None:
+            raise ValueError('I/O operation on closed file')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_args):
+        self.close()
+
+    def close(self):
+        """
+        releases the mapping. if views returned by the view method are still referenced, the mapping is released once
+        the last of them is garbage collected.
+        """
+        if self._map is not None:
+            self._view.release()
+            try:
+                self._map.close()
+            except BufferError:
+                pass
+            self._map = self._view = None
+
+    def read(self, size: int = -1) -> bytes:
+        self._check_open()
+        start = self._position
+        end = len(self._map) if size is None or size < 0 else min(start + size, len(self._map))
+        self._position = max(start, end)
+        return self._map[start:end]
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        self._check_open()
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += len(self._map)
+        if offset < 0:
+            raise ValueError('negative seek position {}'.format(offset))
+        self._position = offset
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    @staticmethod
+    def readable() -> bool:
+        return True
+
+    @staticmethod
+    def seekable() -> bool:
+        return True
+
+    def view(self, offset: int, size: int) -> memoryview:
+        """
+        returns a read-only view on the part of the file starting at the specified offset, without copying it.
+
+        :param offset: offset of the first byte in the file
+        :param size: number of bytes
+        :raise ValueError: if the range is out of the file, or if the stream is closed
+        """
+        self._check_open()
+        if offset < 0 or size < 0 or offset + size > len(self._map):
+            raise ValueError('range 0x{:X}-0x{:X} out of file bounds'.format(offset, offset + size))
+        return self._view[offset:offset + size]
@@ -0,0 +1,138 @@
+"""
+:file: symtab.py
+:author: Guillaume Sottas
+:date: 18/10/2026
+"""
+import array
+import struct
+import typing
+
+from elftools.construct import Container
+from elftools.elf.enums import ENUM_ST_INFO_BIND, ENUM_ST_INFO_TYPE, ENUM_ST_SHNDX, ENUM_ST_VISIBILITY
+
+STT_OBJECT = ENUM_ST_INFO_TYPE['STT_OBJECT']
+STT_FILE = ENUM_ST_INFO_TYPE['STT_FILE']
+
+
+def _reverse(enum: dict) -> typing.Dict[int, str]:
+    names = dict()
+    for name, value in enum.items():
+        if isinstance(value, int):
+            names.setdefault(value, name)
+    return names
+
+
+class SymbolTable(object):
+    """
+    symbols of the symbol table sections of an ELF file, stored column by column.
+
+    each column is an array.array (except for the names, which are stored in a list), in which the row i holds the
+    value of the symbol i. the columns can be handed over without copy to any library supporting the buffer protocol,
+    for instance with numpy.frombuffer. several symbols may have the same name (local symbols of different
+    compilation units, for instance), the rows method returns all of them.
+    """
+
+    _FORMATS = {32: ('I', 'IIIBBH', (0, 1, 2, 3, 4, 5)),
+                64: ('Q', 'IBBHQQ', (0, 4, 5, 1, 2, 3))}
+
+    _TYPES = _reverse(ENUM_ST_INFO_TYPE)
+    _BINDS = _reverse(ENUM_ST_INFO_BIND)
+    _VISIBILITIES = _reverse(ENUM_ST_VISIBILITY)
+    _SECTION_INDEXES = _reverse(ENUM_ST_SHNDX)
+
+    def __init__(self, elf_class: int = 32):
+        address_code = self._FORMATS[elf_class][0]
+        self._elf_class = elf_class
+        self.names = list()
+        self.values = array.array(address_code)
+        self.sizes = array.array(address_code)
+        self.infos = array.array('B')
+        self.others = array.array('B')
+        self.section_indexes = array.array('H')
+        # last row of each name, and all the rows of the names used by several symbols.
+        self._rows = dict()
+        self._duplicates = dict()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._rows
+
+    def load(self, data: typing.Union[bytes, memoryview], entry_size: int, string_table: bytes, little_endian: bool):
+        """
+        appends the symbols of a symbol table section.
+
+        :param data: content of the symbol table section
+        :param entry_size: size of a symbol entry, in [byte]
+        :param string_table: content of the string table section associated to the symbol table section
+        :param little_endian: True if the ELF file is little endian
+        """
+        _, fmt, order = self._FORMATS[self._elf_class]
+        entry = struct.Struct(('<' if little_endian else '>') + fmt)
+        if entry_size < entry.size:
+            raise ValueError('invalid symbol entry size {}'.format(entry_size))
+        entry = struct.Struct(entry.format + '{}x'.format(entry_size - entry.size))
+        data = data[:len(data) - len(data) % entry.size]
+        columns = tuple(zip(*entry.iter_unpack(data)))
+        if not columns:
+            return
+        names, values, sizes, infos, others, section_indexes = (columns[i] for i in order)
+        strings = dict()
+        row = len(self.names)
+        for offset in names:
+            if offset not in strings:
+                end = string_table.find(b'\0', offset)
+                strings[offset] = string_table[offset:end if end >= 0 else None].decode('utf-8', 'replace')
+            name = strings[offset]
+            self.names.append(name)
+            if name in self._rows:
+                self._duplicates.setdefault(name, [self._rows[name]]).append(row)
+            self._rows[name] = row
+            row += 1
+        self.values.extend(values)
+        self.sizes.extend(sizes)
+        self.infos.extend(infos)
+        self.others.extend(others)
+        self.section_indexes.extend(section_indexes)
+
+    def unique_names(self) -> typing.Iterator[str]:
+        """
+        returns an iterator on the names of the symbols, each name being returned once.
+        """
+        return iter(self._rows)
+
+    def row(self, name: str) -> int:
+        """
+        returns the row of the last symbol with the specified name.
+
+        :raise KeyError: if no symbol has this name
+        """
+        return self._rows[name]
+
+    def rows(self, name: str) -> typing.List[int]:
+        """
+        returns the rows of all the symbols with the specified name, in the order of the symbol tables.
+        """
+        if name in self._duplicates:
+            return list(self._duplicates[name])
+        return [self._rows[name]] if name in self._rows else []
+
+    def type(self, row: int) -> int:
+        return self.infos[row] & 0xF
+
+    def bind(self, row: int) -> int:
+        return self.infos[row] >> 4
+
+    def entry(self, row: int) -> Container:
+        """
+        returns the symbol of a row in the form of the entries created by pyelftools.
+        """
+        section_index = self.section_indexes[row]
+        return Container(st_value=self.values[row],
+                         st_size=self.sizes[row],
+                         st_info=Container(bind=self._BINDS.get(self.bind(row), self.bind(row)),
+                                           type=self._TYPES.get(self.type(row), self.type(row))),
+                         st_other=Container(visibility=self._VISIBILITIES.get(self.others[row] & 0x7,
+                                                                              self.others[row] & 0x7)),
+                         st_shndx=self._SECTION_INDEXES.get(section_index, section_index))
@@ -4,16 +4,76 @@
 :date: 27/06/2018
 """
 
+import errno
+import io
+import json
 import os
+import shutil
+import subprocess
+import sys
 
 import pytest
 
-from pyelf.parser import Address, ElfException, ElfFile, Variable
+import cli
+from pyelf.cache import RecordCache
+from pyelf.codec import Codec
+from pyelf.diff import diff
+from pyelf.dtypes import extract_bit_field, to_dtype
+from pyelf.export import write
+from pyelf.fields import FieldTable
+from pyelf.image import Image, MemoryMap
+from pyelf.index import IntervalIndex, NameIndex
+from pyelf.lines import FunctionTable, LineTable
+from pyelf.parser import Address, Array, BaseType, ElfException, ElfFile, Pointer, Structure, Variable
+from pyelf.paths import PathResolver
+from pyelf.serializer import dump
+from pyelf.stream import MappedStream
 
 elf_files = (
     os.path.join(os.path.dirname(__file__), '..', 'tests', 'big_endian.elf'),
     os.path.join(os.path.dirname(__file__), '..', 'tests', 'little_endian.elf'))
 
+opaque_sources = (('opaque_0.c', 'opaque_1.c'), ('opaque_1.c', 'opaque_0.c'))
+
+
+def build_elf(directory, sources) -> str:
+    """
+    compiles and links the C sources of the tests directory, in the given order, with the host compiler, and returns
+    the path of the ELF file. the test is skipped if no compiler is available.
+    """
+    if shutil.which('gcc') is None:
+        pytest.skip('gcc is required to build the ELF file')
+    path = os.path.join(str(directory), '_'.join(os.path.splitext(s)[0] for s in sources) + '.elf')
+    command = ['gcc', '-g', '-O0', '-nostdlib', '-nostartfiles', '-static', '-Wl,-e,0', '-o', path]
+    command += [os.path.join(os.path.dirname(__file__), '..', 'tests', s) for s in sources]
+    if subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode != 0:
+        pytest.skip('failed to build the ELF file')
+    return path
+
+
+class FakeParent(object):
+    """
+    stands for the ElfFile owning the types built by the tests: holds the types and their sizes by DIE offset, and
+    counts the lookups of the types.
+    """
+
+    def __init__(self):
+        self.types = dict()
+        self.sizes = dict()
+        self.lookups = 0
+
+    def get_type_from_offset(self, offset, _type_name=None):
+        self.lookups += 1
+        return self.types[offset]
+
+    def sizeof(self, t) -> int:
+        return next(self.sizes[k] for k, v in self.types.items() if v is t)
+
+
+@pytest.fixture
+def parent():
+    return FakeParent()
+
 
 @pytest.mark.parametrize('address, expected_string', ((-1, '-0x00000001'), (12, '0x0000000C')))
 def test_address_string_format(address, expected_string):
@@ -848,6 +908,520 @@ def test_get_variable_json_little_endian(elf_file, variable, value):
     assert elf_file.get_variable(variable).to_json() == value
 
 
+@pytest.mark.parametrize('elf_file', elf_files)
+def test_lazy_loading(elf_file):
+    eager_elf_file = ElfFile(elf_file)
+    lazy_elf_file = ElfFile(elf_file, lazy=True)
+    assert lazy_elf_file.get_variable('dummy_struct').to_json() == eager_elf_file.get_variable('dummy_struct').to_json()
+    assert [v.to_json() for v in lazy_elf_file.variables()] == [v.to_json() for v in eager_elf_file.variables()]
+
+
+@pytest.mark.parametrize('sources', opaque_sources)
+@pytest.mark.parametrize('lazy', (False, True))
+def test_opaque_type(tmp_path, sources, lazy):
+    opaque = ElfFile(build_elf(tmp_path, sources), lazy=lazy).get_variable('optr').type.type
+    assert isinstance(opaque, Structure) and not opaque.declaration
+    assert opaque.size == 12
+    assert [f.name for f in opaque.fields] == ['a', 'b']
+
+
+@pytest.mark.parametrize('elf_file', elf_files)
+@pytest.mark.parametrize('min_units', (1, 64))
+@pytest.mark.parametrize('workers', (2, 4))
+def test_parallel_loading(elf_file, min_units, workers, monkeypatch):
+    monkeypatch.setattr(ElfFile, '_PARALLEL_MIN_UNITS', min_units)
+    serial_elf_file = ElfFile(elf_file)
+    parallel_elf_file = ElfFile(elf_file, workers=workers)
+    assert [v.to_json() for v in parallel_elf_file.variables()] == [v.to_json() for v in serial_elf_file.variables()]
+
+
+@pytest.mark.parametrize('elf_file', elf_files)
+def test_cached_loading(elf_file, tmp_path):
+    expected = [v.to_json() for v in ElfFile(elf_file).variables()]
+    assert [v.to_json() for v in ElfFile(elf_file, cache_dir=str(tmp_path)).variables()] == expected
+    assert [v.to_json() for v in ElfFile(elf_file, cache_dir=str(tmp_path)).variables()] == expected
+    for entry in tmp_path.iterdir():
+        entry.write_bytes(entry.read_bytes()[:-1])
+    assert [v.to_json() for v in ElfFile(elf_file, cache_dir=str(tmp_path)).variables()] == expected
+
+
+@pytest.mark.parametrize('elf_file', elf_files)
+def test_cached_loading_unwritable_directory(elf_file, tmp_path):
+    expected = [v.to_json() for v in ElfFile(elf_file).variables()]
+    read_only_directory = tmp_path / 'read_only'
+    read_only_directory.mkdir()
+    read_only_directory.chmod(0o555)
+    (tmp_path / 'file').write_bytes(b'')
+    for cache_dir in (read_only_directory, tmp_path / 'file' / 'cache'):
+        assert [v.to_json() for v in ElfFile(elf_file, cache_dir=str(cache_dir)).variables()] == expected
+
+
+def test_record_cache_full_directory(tmp_path, monkeypatch):
+    def replace(*_args):
+        raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+
+    monkeypatch.setattr(os, 'replace', replace)
+    assert not RecordCache(str(tmp_path)).store('key', [('DW_TAG_base_type', 0, 'int', 4, 5)])
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize('elf_file', elf_files)
+def test_context_manager(elf_file):
+    with ElfFile(elf_file) as elf:
+        variable = elf.get_variable('dummy_struct')
+        assert bytes(elf.section_view('.code')[:4]) == elf.get_section_by_name('.code').data()[:4]
+    assert elf.stream.closed
+    assert variable.type.name == 'dummy_struct_type'
+    with pytest.raises(ValueError):
+        elf.get_source_info(0x00000030)
+
+
+def test_closed_stream():
+    stream = MappedStream(__file__)
+    stream.close()
+    assert stream.closed
+    for access in (stream.read, lambda: stream.seek(0), lambda: stream.view(0, 4)):
+        with pytest.raises(ValueError):
+            access()
+
+
+@pytest.mark.parametrize('elf_file', elf_files)
+def test_load_symbols_only(elf_file):
+    elf_file = ElfFile(elf_file, load={'symbols'})
+    assert elf_file.get_symbol('dummy_struct').size == 520
+    assert list(elf_file.variables()) == []
+    with pytest.raises(ElfException):
+        elf_file.get_source_info(0x00000030)
+
+
+@pytest.mark.parametrize('elf_file', elf_files)
+def test_iter_variables_streaming(elf_file):
+    expected = [(v.name, v.to_json()) for v in ElfFile(elf_file).variables()]
+    streamed = sorted(((v.name, v.to_json()) for v in ElfFile.iter_variables_streaming(elf_file)), key=lambda v: v[0])
+    assert streamed == expected
+
+
+@pytest.mark.parametrize('sources', opaque_sources)
+def test_iter_variables_streaming_opaque_type(tmp_path, sources):
+    elf_file = build_elf(tmp_path, sources)
+    expected = [(v.name, v.to_json()) for v in ElfFile(elf_file).variables()]
+    streamed = sorted(((v.name, v.to_json()) for v in ElfFile.iter_variables_streaming(elf_file)), key=lambda v: v[0])
+    assert streamed == expected
+
+
+@pytest.mark.parametrize('elf_file', elf_files)
+def test_get_type_from_type_name(elf_file):
+    elf_file = ElfFile(elf_file)
+    assert elf_file.get_type_from_type_name('u8').type is elf_file.get_type_from_type_name('unsigned char')
+    assert elf_file.get_type_from_type_name('dummy_struct_type').size == 520
+    assert elf_file.get_type_from_type_name('not_valid_type') == 'not_valid_type'
+
+
+def test_recursive_structure_to_json(parent):
+    parent.types[1] = BaseType('int', 4)
+    parent.types[2] = Pointer('anonymous_2', 'node', parent, 3)
+    parent.types[3] = Structure('node', 8, (Structure.Field('value', 'int', parent, 0, type_offset=1),
+                                            Structure.Field('next', 'anonymous_2', parent, 4, type_offset=2)))
+    assert parent.types[3].to_json()['fields'][1]['type']['type'] == dict(_type='Structure', name='node', size=8)
+    lookups = parent.lookups
+    parent.types[3].to_json()
+    assert parent.lookups == lookups
+
+
+def test_unresolved_type_not_kept(parent):
+    pointer = Pointer('anonymous_2', 'opaque', parent, 1)
+    parent.types[1] = 'opaque'
+    assert pointer.type == 'opaque'
+    parent.types[1] = Structure('opaque', 0, (), declaration=True)
+    assert pointer.type.declaration
+    parent.types[1] = Structure('opaque', 4, (Structure.Field('a', 'int', parent, 0),))
+    assert pointer.type is parent.types[1]
+    parent.types[1] = 'opaque'
+    assert pointer.type.size == 4
+
+
+@pytest.mark.parametrize('elf_file', elf_files)
+def test_dump(elf_file):
+    elf_file = ElfFile(elf_file)
+    fp = io.StringIO()
+    dump(elf_file.variables(), fp)
+    document = json.loads(fp.getvalue())
+    variable = next(v for v in document['variables'] if v['name'] == 'dummy_var_no_init_uint8')
+    assert variable['address'] == 0x08400000
+    assert document['types'][variable['type']['$ref'].split('/')[-1]] == {'_type': 'BaseType',
+                                                                          'name': 'unsigned char',
+                                                                          'size': 1}
+
+
+@pytest.mark.parametrize('elf_file', elf_files)
+def test_compact_model(elf_file):
+    variable = ElfFile(elf_file).get_variable('dummy_struct')
+    assert not hasattr(variable, '__dict__')
+    assert not hasattr(variable.type, '__dict__')
+    assert all(not hasattr(f, '__dict__') for f in variable.type.fields)
+    assert variable.type.name is sys.intern(''.join(variable.type.name))
+
+
+@pytest.mark.parametrize('elf_file', elf_files)
+def test_get_symbols(elf_file):
+    elf_file = ElfFile(elf_file)
+    symbols = elf_file.get_symbols('dummy_struct')
+    assert symbols[-1].address == elf_file.get_symbol('dummy_struct').address
+    assert elf_file.symbol_table.sizes[elf_file.symbol_table.row('dummy_struct')] == 520
+    assert elf_file.symbol_table.rows('not_valid_symbol') == []
+    with pytest.raises(ElfException):
+        elf_file.get_symbols('not_valid_symbol')
+
+
+@pytest.mark.parametrize('elf_file', elf_files)
+def test_address_index(elf_file):
+    elf_file = ElfFile(elf_file)
+    assert elf_file.symbol_at(0x08400019).name == 'dummy_struct'
+    assert [s.name for s in elf_file.symbols_in_range(0x08400000, 0x08400006)] == ['dummy_var_no_init_uint8',
+                                                                                 'dummy_var_no_init_uint16']
+    assert elf_file.field_at(0x08400018)[:3] == ('dummy_struct.field_uint8', 0x08400018, 1)
+    assert elf_file.field_at(0x0840001A)[0] == 'dummy_struct.field_uint16'
+    assert [f[0] for f in elf_file.fields_in_range(0x08400004, 0x0840000C)] == ['dummy_var_no_init_uint16',
+                                                                              'dummy_var_no_init_uint32']
+
+
+def test_interval_index():
+    # a section-sized interval covers the symbols, which nest or overlap in places.
+    intervals = [(0, 1000, 'section'), (10, 10, 'empty')] + [(10 * i, 10 * i + 12, i) for i in range(1, 99)]
+    index = IntervalIndex(reversed(intervals))
+    assert len(index) == 99
+    for address in range(-1, 1002, 3):
+        assert index.at(address) == [v for s, e, v in intervals if s <= address < e]
+        assert index.overlapping(address, address + 25) == [v for s, e, v in intervals if s < e and
+                                                             s < address + 25 and e > address]
+    assert index.overlapping(20, 20) == []
+
+
+@pytest.mark.parametrize('address, expected', ((0x0F, None),
+                                                 (0x10, ('a.c', 1)),
+                                                 (0x14, ('a.c', 3)),
+                                                 (0x18, ('a.c', 2)),
+                                                 (0x1C, ('b.c', 7)),
+                                                 (0x20, None)))
+def test_line_table(address, expected):
+    table = LineTable(('a.c', 'b.c'), ((0x10, 0x1C, (0, 0), 0, 1),
+                                       (0x18, 0x1C, (0, -1), 0, 2),
+                                       (0x14, 0x18, (0, -2), 0, 3),
+                                       (0x10, 0x20, (1, 0), 1, 7)))
+    assert table.lookup(address) == expected
+
+
+@pytest.mark.parametrize('address, expected', ((0x0F, []),
+                                                 (0x10, ['main']),
+                                                 (0x14, ['main', 'inlined']),
+                                                 (0x16, ['main', 'inlined', 'leaf']),
+                                                 (0x34, ['main']),
+                                                 (0x40, ['other'])))
+def test_function_table(address, expected):
+    table = FunctionTable(((0x10, 0x20, (0x100, 0x0, 'main')),
+                           (0x30, 0x38, (0x100, 0x0, 'main')),
+                           (0x14, 0x18, (0x120, 0x0, 'inlined')),
+                           (0x16, 0x17, (0x140, 0x0, 'leaf')),
+                           (0x40, 0x48, (0x300, 0x200, 'other')),
+                           (0x10, 0x20, (0x380, 0x200, 'duplicate'))))
+    assert table.lookup(address) == expected
+
+
+@pytest.mark.parametrize('elf_file', elf_files)
+def test_symbolize(elf_file):
+    elf_file = ElfFile(elf_file)
+    addresses = (0x00000030, 0xFFFFFFF0, 0x00000030)
+    table = elf_file.symbolize(addresses)
+    assert len(table) == 3
+    assert [table[i] for i in range(3)] == [elf_file.get_source_info(a) for a in addresses]
+    assert table.file_ids[0] == table.file_ids[2] and table.file_ids[1] == -1
+    assert table.functions[table.function_ids[0]] == 'main'
+    assert len(elf_file.symbolize([])) == 0
+
+
+@pytest.mark.parametrize('fill', (0x00, 0xFF))
+@pytest.mark.parametrize('chunk_size', (1, 3, 1 << 16))
+def test_image(fill, chunk_size):
+    image = Image(((0x108, b'\x05\x06'), (0x100, b'\x01\x02\x03'), (0x101, b'\x07\x08\x09\x0A'), (0x0F0, b''),
+                   (0x200, b'')), fill)
+    expected = bytes((0x01, 0x02, 0x03, 0x09, 0x0A, fill, fill, fill, 0x05, 0x06))
+    assert image.address == 0x100
+    assert len(image) == len(expected)
+    assert image.tobytes() == expected
+    assert image.view.readonly
+    fp = io.BytesIO()
+    image.write(fp, chunk_size)
+    assert fp.getvalue() == expected
+    assert all(len(data) <= chunk_size for _, data in image.chunks(chunk_size))
+
+
+@pytest.mark.parametrize('output_format, expected', (
+        ('binary', b'\x01\x02\x03\x04'),
+        ('ihex', b':02FFFE000102FE\r\n:020000040001F9\r\n:020000000304F7\r\n:00000001FF\r\n'),
+        ('srec', b'S0030000FC\r\nS20800FFFE01020304F0\r\nS804000000FB\r\n')))
+def test_export(output_format, expected):
+    fp = io.BytesIO()
+    write(Image(((0xFFFE, b'\x01\x02\x03\x04'),)), fp, output_format)
+    assert fp.getvalue() == expected
+
+
+@pytest.mark.parametrize('elf_file', elf_files)
+def test_read_memory(elf_file):
+    elf_file = ElfFile(elf_file)
+    assert len(elf_file.read_memory(0x08400018, 520)) == 520
+    assert bytes(elf_file.read_memory(elf_file.binary_address, 16, physical=True)) == elf_file.binary[:16]
+    with pytest.raises(ElfException):
+        elf_file.read_memory(0xFFFFFFF0, 4)
+
+
+def test_memory_map():
+    memory_map = MemoryMap(MappedStream(__file__), ((0x100, 8, 0, 4), (0x108, 4, 4, 4), (0x200, 4, 8, 4)))
+    with open(__file__, 'rb') as fp:
+        content = fp.read(12)
+    assert bytes(memory_map.read(0x100, 4)) == content[:4]
+    assert bytes(memory_map.read(0x102, 4)) == content[2:4] + bytes(2)
+    assert bytes(memory_map.read(0x106, 4)) == bytes(2) + content[4:6]
+    assert bytes(memory_map.read(0x200, 4)) == content[8:12]
+    with pytest.raises(ValueError):
+        memory_map.read(0x10A, 4)
+
+
+@pytest.mark.parametrize('elf_file', elf_files)
+def test_decoder(elf_file):
+    elf_file = ElfFile(elf_file)
+    variable = elf_file.get_variable('dummy_struct')
+    decoder = elf_file.decoder('dummy_struct')
+    assert decoder is elf_file.decoder(variable.type)
+    value = decoder.decode(elf_file.read_memory(variable.address, decoder.size))
+    assert list(value.keys()) == [f.name for f in variable.type.fields]
+    with pytest.raises(ElfException):
+        elf_file.decoder('not_valid_name')
+
+
+def test_codec(parent):
+    parent.types[1] = BaseType('signed char', 1, 6)
+    parent.types[2] = BaseType('short unsigned int', 2, 7)
+    parent.types[3] = BaseType('int', 4, 5)
+    parent.types[4] = BaseType('short int', 2, 5)
+    parent.types[5] = Array('anonymous_5', 'short int', parent, [1, 1], type_offset=4)
+    parent.types[6] = Pointer('anonymous_6', 'int', parent, 3)
+    parent.types[7] = Structure('record', 20, (Structure.Field('i8', 'signed char', parent, 0, type_offset=1),
+                                               Structure.Field('u16', 'short unsigned int', parent, 2, type_offset=2),
+                                               Structure.Field('a', 'int', parent, 4, 31, 1, type_offset=3),
+                                               Structure.Field('b', 'int', parent, 4, 28, 3, type_offset=3),
+                                               Structure.Field('m', 'anonymous_5', parent, 8, type_offset=5),
+                                               Structure.Field('p', 'anonymous_6', parent, 16, type_offset=6)))
+    parent.sizes.update({1: 1, 2: 2, 3: 4, 4: 2, 5: 8, 6: 4, 7: 20})
+    buffer = bytes((0xFB, 0xAA, 0x34, 0x12, 0x0B, 0, 0, 0, 1, 0, 0xFE, 0xFF, 3, 0, 0xFC, 0xFF, 0x78, 0x56, 0x34, 0x12))
+    codec = Codec(parent.types[7], 'little', parent.sizeof, 4)
+    assert codec.size == 20
+    assert codec.decode(b'\x00' + buffer, 1) == dict(i8=-5, u16=0x1234, a=-1, b=-3, m=[[1, -2], [3, -4]], p=0x12345678)
+    big_endian = Codec(parent.types[2], 'big', parent.sizeof, 4)
+    assert big_endian.decode(buffer, 2) == 0x3412
+    with pytest.raises(ValueError):
+        Codec('void', 'little', parent.sizeof, 4)
+
+
+@pytest.mark.parametrize('elf_file', elf_files)
+def test_dtype(elf_file):
+    numpy = pytest.importorskip('numpy')
+    elf_file = ElfFile(elf_file)
+    variable = elf_file.get_variable('dummy_struct')
+    dtype = elf_file.dtype('dummy_struct')
+    assert dtype is elf_file.dtype(variable.type)
+    assert dtype.itemsize == variable.type.size
+    assert dtype.names == tuple(f.name for f in variable.type.fields)
+    records = numpy.frombuffer(bytes(elf_file.read_memory(variable.address, dtype.itemsize)) * 2, dtype=dtype)
+    value = elf_file.decoder('dummy_struct').decode(elf_file.read_memory(variable.address, dtype.itemsize))
+    assert extract_bit_field(records, 'bit_field_2_size_3').tolist() == [value['bit_field_2_size_3']] * 2
+
+
+def test_to_dtype(parent):
+    numpy = pytest.importorskip('numpy')
+    parent.types[1] = BaseType('short unsigned int', 2, 7)
+    parent.types[2] = BaseType('int', 4, 5)
+    parent.types[3] = Array('anonymous_3', 'short unsigned int', parent, [1, 2], type_offset=1)
+    parent.types[4] = Structure('record', 16, (Structure.Field('u16', 'short unsigned int', parent, 0, type_offset=1),
+                                               Structure.Field('a', 'int', parent, 0, 29, 3, type_offset=2),
+                                               Structure.Field('m', 'anonymous_3', parent, 4, type_offset=3)))
+    parent.sizes.update({1: 2, 2: 4, 3: 12, 4: 16})
+    dtype = to_dtype(parent.types[4], 'big', parent.sizeof, 4)
+    assert dtype.itemsize == 16
+    assert dtype.fields['m'][0].shape == (2, 3) and dtype.fields['m'][1] == 4
+    buffer = bytes((0x12, 0x34, 0x00, 0x07, 0, 1, 0, 2, 0, 3, 0, 4, 0, 5, 0, 6))
+    records = numpy.frombuffer(buffer * 2, dtype=dtype)
+    assert records['u16'].tolist() == [0x1234] * 2
+    assert records['m'][1].tolist() == [[1, 2, 3], [4, 5, 6]]
+    assert extract_bit_field(records, 'a').tolist() == [-1] * 2
+    with pytest.raises(ValueError):
+        extract_bit_field(records, 'u16')
+
+
+@pytest.mark.parametrize('elf_file', elf_files)
+def test_field_table(elf_file):
+    elf_file = ElfFile(elf_file)
+    table = elf_file.field_table
+    assert table is elf_file.field_table
+    fields = sorted(elf_file.fields_in_range(0x00000000, 0x100000000), key=lambda f: (f[0], f[1]))
+    assert sorted((table[i][:3] for i in range(len(table))), key=lambda f: (f[0], f[1])) == [f[:3] for f in fields]
+    rows = [i for i in range(len(table)) if table.paths[i].startswith('dummy_struct.bit_field_')]
+    assert all(table.bit_sizes[i] > 0 for i in rows)
+
+
+def test_field_table_from_variables(parent):
+    parent.types[1] = BaseType('short unsigned int', 2, 7)
+    parent.types[2] = Array('anonymous_2', 'short unsigned int', parent, [1, 0], type_offset=1)
+    parent.types[3] = Structure('record', 8, (Structure.Field('a', 'short unsigned int', parent, 0, 12, 4, 1),
+                                              Structure.Field('m', 'anonymous_2', parent, 2, type_offset=2)))
+    parent.types[4] = Array('anonymous_4', 'record', parent, [1], type_offset=3)
+    parent.sizes.update({1: 2, 2: 4, 3: 8, 4: 16})
+    table = FieldTable.from_variables((Variable('var', 'anonymous_4', parent, 0x1000, 4),), parent.sizeof)
+    assert table.paths == ['var[0].a', 'var[0].m[0][0]', 'var[0].m[1][0]',
+                           'var[1].a', 'var[1].m[0][0]', 'var[1].m[1][0]']
+    assert table.addresses.tolist() == [0x1000, 0x1002, 0x1004, 0x1008, 0x100A, 0x100C]
+    assert table.sizes.tolist() == [2] * 6
+    assert table.bit_sizes.tolist() == [4, -1, -1, 4, -1, -1]
+    assert table.types == [parent.types[1]]
+    assert table.take([4, 0])[0] == ('var[1].m[0][0]', 0x100A, 2, parent.types[1], -1, -1)
+
+
+@pytest.mark.parametrize('elf_file', elf_files)
+def test_resolve(elf_file):
+    elf_file = ElfFile(elf_file)
+    table = elf_file.field_table
+    assert all(elf_file.resolve(table.paths[i])[:2] == (table.addresses[i], table.sizes[i]) for i in range(len(table)))
+    variable = elf_file.get_variable('dummy_struct')
+    assert elf_file.resolve('dummy_struct') == (variable.address, variable.type.size, variable.type)
+    assert [f[0] for f in elf_file.expand('dummy_struct.field_u*')] == ['dummy_struct.field_uint8',
+                                                                         'dummy_struct.field_uint16',
+                                                                         'dummy_struct.field_uint32',
+                                                                         'dummy_struct.field_u8',
+                                                                         'dummy_struct.field_u16',
+                                                                         'dummy_struct.field_u32']
+    with pytest.raises(ElfException):
+        elf_file.resolve('dummy_struct.not_valid_field')
+
+
+def test_path_resolver(parent):
+    parent.types[1] = BaseType('short unsigned int', 2, 7)
+    parent.types[2] = Array('anonymous_2', 'short unsigned int', parent, [1, 2], type_offset=1)
+    parent.types[3] = Structure('record', 14, (Structure.Field('counter', 'short unsigned int', parent, 0,
+                                                               type_offset=1),
+                                               Structure.Field('m', 'anonymous_2', parent, 2, type_offset=2)))
+    parent.types[4] = Array('anonymous_4', 'record', parent, [3], type_offset=3)
+    parent.sizes.update({1: 2, 2: 12, 3: 14, 4: 56})
+    variables = dict(buf=Variable('buf', 'anonymous_4', parent, 0x1000, 4),
+                     rec=Variable('rec', 'record', parent, 0x2000, 3))
+    resolver = PathResolver(variables.__getitem__, variables.keys, parent.sizeof)
+    assert resolver.resolve('buf[2].m[1][2]') == (0x1000 + 2 * 14 + 2 + (3 + 2) * 2, 2, parent.types[1])
+    assert resolver.resolve('rec') == (0x2000, 14, parent.types[3])
+    assert [f[:2] for f in resolver.expand('*.counter')] == [('rec.counter', 0x2000)]
+    assert [f[0] for f in resolver.expand('buf[*].m[1][*]')][:4] == ['buf[0].m[1][0]', 'buf[0].m[1][1]',
+                                                                      'buf[0].m[1][2]', 'buf[1].m[1][0]']
+    assert len(resolver.expand('buf[*].m[*][*]')) == 4 * 2 * 3
+    for path in ('buf[4]', 'buf[0].m[1]', 'rec[0]', 'rec.other', 'other', 'rec..counter', 'buf[*]'):
+        with pytest.raises(ValueError):
+            resolver.resolve(path)
+
+
+@pytest.mark.parametrize('elf_file', elf_files)
+def test_find_names(elf_file):
+    elf_file = ElfFile(elf_file)
+    assert 'dummy_struct' in elf_file.find_symbols('dummy_*')
+    assert elf_file.find_variables('dummy_var_no_init_uint', 'prefix') == ['dummy_var_no_init_uint16',
+                                                                         'dummy_var_no_init_uint32',
+                                                                         'dummy_var_no_init_uint8']
+    assert elf_file.find_variables(r'^dummy_var_no_init_s\w*8$', 'regex') == ['dummy_var_no_init_sint8']
+    assert 'dummy_struct_type' in elf_file.find_types('*_type', tag='DW_TAG_structure_type')
+    assert 'dummy_struct_type' not in elf_file.find_types('*', tag='DW_TAG_union_type')
+    with pytest.raises(ElfException):
+        elf_file.find_symbols('(', 'regex')
+
+
+def test_name_index():
+    names = ['Can_Init', 'Can_Write', 'CanIf_Init', 'Com_Init', 'Com_MainFunction', 'a]b', 'Can_Init']
+    index = NameIndex(names)
+    assert len(index) == 6
+    assert index.prefix('Can') == ['CanIf_Init', 'Can_Init', 'Can_Write']
+    assert index.prefix('Dem') == []
+    assert index.glob('Can_*') == ['Can_Init', 'Can_Write']
+    assert index.glob('*_Init') == ['CanIf_Init', 'Can_Init', 'Com_Init']
+    assert index.glob('C?n*_[IW]*') == ['CanIf_Init', 'Can_Init', 'Can_Write']
+    assert index.glob('*]b') == ['a]b']
+    assert index.regex('^Com_M') == ['Com_MainFunction']
+    assert index.regex('^Ca?n') == ['CanIf_Init', 'Can_Init', 'Can_Write']
+    assert index.regex('Init$') == ['CanIf_Init', 'Can_Init', 'Com_Init']
+    assert index.find('Com', 'prefix') == ['Com_Init', 'Com_MainFunction']
+    with pytest.raises(ValueError):
+        index.find('Com', 'other')
+
+
+def test_cli_collect(tmp_path):
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'sub' / 'b.out').write_bytes(b'\x7fELF')
+    (tmp_path / 'a.elf').write_bytes(b'\x7fELF')
+    (tmp_path / 'notes.txt').write_text('not an ELF file')
+    assert list(cli._collect([str(tmp_path), 'other/c.elf'])) == [
+        (str(tmp_path / 'a.elf'), 'a.elf'),
+        (str(tmp_path / 'sub' / 'b.out'), os.path.join('sub', 'b.out')),
+        ('other/c.elf', 'c.elf')]
+
+
+@pytest.mark.parametrize('argv', (['a.elf', '-O', '-o', 'a.bin'], ['a.elf', '-O', 'elf', '-o', 'a.bin'],
+                                  ['a.elf', '-O', 'ihex']))
+def test_cli_output_format(argv):
+    with pytest.raises(SystemExit):
+        cli.main(argv)
+
+
+def test_cli_batch(tmp_path):
+    bad_file = tmp_path / 'bad.elf'
+    bad_file.write_bytes(b'\x7fELF')
+    assert cli.main([*elf_files, str(bad_file), '-D', str(tmp_path / 'out'), '-j', '2']) == 1
+    for elf_file in elf_files:
+        with open(tmp_path / 'out' / (os.path.basename(elf_file) + '.json')) as fp:
+            assert any(v['name'] == 'dummy_struct' for v in json.load(fp))
+    assert not (tmp_path / 'out' / 'bad.elf.json').exists()
+    assert cli.main([*elf_files, '-m', str(tmp_path / 'merged.json'), '-d']) == 0
+    with open(tmp_path / 'merged.json') as fp:
+        assert sorted(json.load(fp).keys()) == sorted(elf_files)
+
+
+@pytest.mark.parametrize('elf_file', elf_files)
+def test_diff(elf_file, capsys):
+    assert ElfFile(elf_file).diff(ElfFile(elf_file)) == []
+    assert cli.main(['diff', elf_file, elf_file]) == 0
+    assert capsys.readouterr().out == ''
+
+
+def test_diff_types():
+    def build(count, offset, extra):
+        parent = FakeParent()
+        parent.types[1] = BaseType('short unsigned int', 2, 7)
+        parent.types[2] = Array('anonymous_2', 'short unsigned int', parent, [count - 1], type_offset=1)
+        fields = [Structure.Field('a', 'short unsigned int', parent, 0, 12, 4, 1),
+                  Structure.Field('m', 'anonymous_2', parent, offset, type_offset=2)]
+        if extra:
+            fields.append(Structure.Field('x', 'short unsigned int', parent, offset + 2 * count, type_offset=1))
+        parent.types[3] = Structure('record', offset + 2 * count + 2 * extra, tuple(fields))
+        parent.sizes.update({1: 2, 2: 2 * count, 3: parent.types[3].size})
+        variables = (Variable('var', 'record', parent, 0x1000, 3), Variable('u16', 'short unsigned int', parent,
+                                                                            0x2000 + offset, 1))
+        return variables, parent.sizeof
+
+    old_variables, old_sizeof = build(2, 2, False)
+    new_variables, new_sizeof = build(3, 4, True)
+    assert diff(old_variables, old_variables, old_sizeof, old_sizeof) == []
+    assert diff(old_variables, build(2, 2, False)[0], old_sizeof, old_sizeof) == []
+    differences = diff(old_variables, new_variables, old_sizeof, new_sizeof)
+    assert [d[:2] for d in differences] == [('moved', 'u16'), ('resized', 'var'), ('moved', 'var.m'),
+                                            ('resized', 'var.m'), ('changed', 'var.m'), ('added', 'var.x')]
+    assert differences[0][2:] == (0x2002, 0x2004)
+    assert differences[3][2:] == (4, 6)
+    assert diff(old_variables[:1], new_variables[1:], old_sizeof, new_sizeof) == [
+        ('added', 'u16', None, new_variables[1]), ('removed', 'var', old_variables[0], None)]
+
+
 @pytest.mark.parametrize('elf_file', elf_files)
 def test_get_not_existent_symbol(elf_file):
     elf_file = ElfFile(elf_file)
@@ -855,6 +1429,16 @@ def test_get_not_existent_symbol(elf_file):
         elf_file.get_symbol('not_valid_symbol')
 
 
+def test_image_nobits_segment(tmp_path):
+    elf_file = ElfFile(build_elf(tmp_path, opaque_sources[0]))
+    segments = [s for s in elf_file.iter_segments() if s['p_type'] == 'PT_LOAD']
+    assert segments[-1]['p_filesz'] == 0 and segments[-1]['p_memsz'] > 0
+    fp = io.BytesIO()
+    elf_file.image().write(fp)
+    assert elf_file.binary == fp.getvalue()
+    assert len(elf_file.binary) == segments[0]['p_filesz']
+
+
 @pytest.mark.parametrize('elf_file', elf_files)
 def test_get_binary_address(elf_file):
     elf_file = ElfFile(elf_file)
@@ -871,6 +1455,9 @@ def test_get_binary(elf_file, bin_file):
     with open(bin_file, 'rb') as fp:
         binary = fp.read()
     assert elf_file.binary == binary
+    fp = io.BytesIO()
+    elf_file.image().write(fp)
+    assert fp.getvalue() == binary
 
 
 @pytest.mark.parametrize('elf_file', elf_files)
@@ -882,3 +1469,4 @@ def test_get_source_info(elf_file, address, expected_source_file, expected_line,
     assert source_file == expected_source_file
     assert line == expected_line
     assert func_name == expected_func_name
+    assert elf_file.get_inline_chain(address)[0] == expected_func_name
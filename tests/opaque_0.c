@@ -0,0 +1,10 @@
+struct opaque;
+
+struct holder {
+    struct opaque *p;
+    int n;
+};
+
+struct opaque *optr;
+
+struct holder holder;
@@ -0,0 +1,6 @@
+struct opaque {
+    int a;
+    char b[6];
+};
+
+struct opaque instance;